@@ -0,0 +1,800 @@
+"""Helpers shared by the GitHub Actions error agents.
+
+The agents are loaded by file path rather than imported as a package, so each
+agent.py puts this directory on sys.path and imports from here. Keeping the LLM
+cache, the OpenAI transport, the contract wrapper, prompt template loading and
+the DACP agent base class in one module means the three agents cannot drift apart.
+"""
+import os
+import inspect
+import asyncio
+import contextlib
+import contextvars
+import logging
+import json
+import functools
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from types import MappingProxyType
+from typing import Optional, Any, Callable, Dict, Mapping, Tuple
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from behavioural_contracts import behavioural_contract, BehaviouralContractViolationError
+
+import dacp
+from dacp import extract_json_from_text, invoke_intelligence
+from dacp.orchestrator import Orchestrator
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; fall back to the stdlib
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def json_dumps_sorted(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+
+    def json_dumps_sorted(obj: Any) -> bytes:
+        return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class LLMCache:
+    """Content-addressed cache of LLM responses.
+
+    Parsed outputs live in a thread-safe in-process LRU for ``ttl`` seconds. When
+    ``DACP_LLM_CACHE_DIR`` is set the raw responses are also written there as
+    ``<sha256>.json`` so they survive restarts and can be shared between agent
+    processes. Entries on disk expire ``ttl`` seconds after they were written,
+    and an entry read back from disk only lives in memory for the rest of that
+    time. A ttl of 0 disables caching.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256, cache_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def key(prompt: str, intelligence_config: Dict[str, Any]) -> bytes:
+        """Hash the prompt and the intelligence config, each with an 8-byte length prefix.
+
+        The raw 32-byte sha256 digest is the in-memory key; it is hex-encoded
+        only to name the entry's file on disk.
+        """
+        digest = hashlib.sha256()
+        for field in (prompt.encode(), json_dumps_sorted(intelligence_config)):
+            digest.update(len(field).to_bytes(8, "big"))
+            digest.update(field)
+        return digest.digest()
+
+    def get(self, key: bytes, parse: Callable[[Any], Tuple[Any, bool]]) -> Any:
+        """Return the cached output for key, or None on a miss.
+
+        A response found only on disk is parsed with ``parse``, which returns the
+        output and whether it fell back to a default, and kept in memory. One that
+        no longer validates is evicted.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, output = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return output
+                del self._entries[key]
+
+        output = None
+        response, remaining = self._read(key)
+        if response is not None:
+            try:
+                output, fell_back = parse(response)
+            except ValueError as e:
+                fell_back = True
+                log.warning("Evicting cached LLM response that failed validation: %s", e)
+            if fell_back:
+                output = None
+                self._unlink(key)
+
+        with self._lock:
+            if output is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, output, remaining)
+        return output
+
+    def set(self, key: bytes, response: Any, output: Any) -> None:
+        """Keep the parsed output in memory and the raw response on disk."""
+        with self._lock:
+            self._store(key, output, self.ttl)
+        self._write(key, response)
+
+    def _store(self, key: bytes, output: Any, lifetime: float) -> None:
+        self._entries[key] = (time.monotonic() + lifetime, output)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: bytes) -> Path:
+        return self.cache_dir / f"{key.hex()}.json"
+
+    def _read(self, key: bytes) -> Tuple[Any, float]:
+        """Return the response stored on disk for key and the seconds it has left, or (None, 0)."""
+        if self.cache_dir is None:
+            return None, 0
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = json_loads(f.read())
+            age = (datetime.now(timezone.utc) - datetime.fromisoformat(entry["created_at"])).total_seconds()
+            response = entry["response"]
+        except FileNotFoundError:
+            return None, 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning("Ignoring unreadable LLM cache entry %s: %s", key.hex(), e)
+            return None, 0
+
+        if age >= self.ttl:
+            self._unlink(key)
+            return None, 0
+        return response, self.ttl - age
+
+    def _write(self, key: bytes, response: Any) -> None:
+        if self.cache_dir is None:
+            return
+        entry = {"created_at": datetime.now(timezone.utc).isoformat(), "response": response}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f"{key.hex()}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(json_dumps(entry))
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            log.warning("Could not write LLM cache entry %s: %s", key.hex(), e)
+
+    def _unlink(self, key: bytes) -> None:
+        if self.cache_dir is not None:
+            self._path(key).unlink(missing_ok=True)
+
+
+# Responses are sampled at a non-zero temperature, so reusing them is opt-in:
+# the cache stays off unless DACP_LLM_CACHE_TTL is set
+LLM_CACHE = LLMCache(
+    ttl=float(os.getenv("DACP_LLM_CACHE_TTL", "0")),
+    cache_dir=os.getenv("DACP_LLM_CACHE_DIR")
+)
+
+
+# Whether the latest llm_cached call in this thread or asyncio task returned the
+# default output. The behavioural contract turns outputs into plain dicts, so the
+# flag cannot travel with the result itself.
+_LLM_FELL_BACK = contextvars.ContextVar("llm_fell_back", default=False)
+
+
+def llm_fell_back() -> bool:
+    """Whether the latest llm_cached call in this context fell back to the default output."""
+    return _LLM_FELL_BACK.get()
+
+
+def llm_cached(adapter: TypeAdapter, default: BaseModel):
+    """Cache the outputs of an ``invoke(prompt, intelligence_config)`` callable.
+
+    The wrapped call returns the response parsed with parse_llm_output. Only
+    responses that validated are cached; a default output filled in for an
+    unusable response is returned but never stored, so the next call asks the
+    LLM again. Either way llm_fell_back() reports afterwards whether the output
+    is that default. Coroutine functions are wrapped with an async wrapper
+    sharing the same cache.
+    """
+    def parse(response: Any) -> Tuple[BaseModel, bool]:
+        return parse_llm_output(response, adapter, default)
+
+    def decorator(invoke: Callable[[str, Dict[str, Any]], Any]):
+        if asyncio.iscoroutinefunction(invoke):
+            @functools.wraps(invoke)
+            async def async_wrapper(prompt: str, intelligence_config: Dict[str, Any]):
+                key = LLMCache.key(prompt, intelligence_config) if LLM_CACHE.enabled else None
+                output = LLM_CACHE.get(key, parse) if key is not None else None
+                fell_back = False
+                if output is None:
+                    response = await invoke(prompt, intelligence_config)
+                    output, fell_back = parse(response)
+                    if key is not None and not fell_back:
+                        LLM_CACHE.set(key, response, output)
+                _LLM_FELL_BACK.set(fell_back)
+                return output
+            return async_wrapper
+
+        @functools.wraps(invoke)
+        def wrapper(prompt: str, intelligence_config: Dict[str, Any]):
+            key = LLMCache.key(prompt, intelligence_config) if LLM_CACHE.enabled else None
+            output = LLM_CACHE.get(key, parse) if key is not None else None
+            fell_back = False
+            if output is None:
+                response = invoke(prompt, intelligence_config)
+                output, fell_back = parse(response)
+                if key is not None and not fell_back:
+                    LLM_CACHE.set(key, response, output)
+            _LLM_FELL_BACK.set(fell_back)
+            return output
+        return wrapper
+    return decorator
+
+
+# Calls are logged on dacp's own logger, in its format, as dacp.invoke_intelligence does
+_INTELLIGENCE_LOG = logging.getLogger("dacp.intelligence")
+
+
+@contextlib.contextmanager
+def _logged_intelligence_call(intelligence_config: Dict[str, Any]):
+    """Log the start, duration and any failure of an LLM call like dacp.invoke_intelligence."""
+    start_time = time.time()
+    _INTELLIGENCE_LOG.info(
+        "🧠 Invoking intelligence: engine='%s', model='%s'",
+        intelligence_config.get("engine", "").lower(), intelligence_config.get("model", "unknown")
+    )
+    try:
+        yield
+    except Exception as e:
+        _INTELLIGENCE_LOG.error(
+            "❌ Intelligence call failed after %.3fs: %s: %s", time.time() - start_time, type(e).__name__, e
+        )
+        raise
+    _INTELLIGENCE_LOG.info("✅ Intelligence call completed in %.3fs", time.time() - start_time)
+
+
+def _openai_client_options(openai, http_client_class) -> Dict[str, Any]:
+    """Settings shared by the sync and async OpenAI clients.
+
+    The HTTP client is built from the SDK's own class so its connection pool
+    limits stay in place; only HTTP/2 is turned on when available.
+    """
+    try:
+        import h2  # noqa: F401  HTTP/2 needs the optional h2 package
+        http2 = True
+    except ImportError:
+        http2 = False
+    return {
+        "timeout": openai.Timeout(120.0, connect=10.0),
+        "http_client": http_client_class(http2=http2)
+    }
+
+
+def _openai_client_key(intelligence_config: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """Return the API key and base URL an OpenAI client is built with, as dacp resolves them."""
+    api_key = intelligence_config.get("api_key") or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OpenAI API key not found in config or OPENAI_API_KEY environment variable")
+    # None lets the SDK apply OPENAI_BASE_URL or its default, as dacp's client does
+    return api_key, intelligence_config.get("base_url") or None
+
+
+def _openai_request(prompt: str, intelligence_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the chat completions arguments with dacp's defaults."""
+    return {
+        "model": intelligence_config.get("model", "gpt-3.5-turbo"),
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": intelligence_config.get("temperature", 0.7),
+        "max_tokens": intelligence_config.get("max_tokens", 1000),
+    }
+
+
+def _openai_content(completion) -> str:
+    """Extract the completion text from a chat completion."""
+    content = completion.choices[0].message.content
+    if content is None:
+        raise ValueError("OpenAI returned empty response")
+    return str(content)
+
+
+def _is_openai(intelligence_config: Dict[str, Any]) -> bool:
+    return intelligence_config.get("engine", "").lower() in ("openai", "gpt")
+
+
+# dacp builds a new OpenAI client, and with it a new connection, on every call.
+# OpenAI requests go through one thread-safe client per API key and base URL
+# instead, so the TLS session to the API is reused across calls. The SDK client
+# keeps its retries on rate limits, server errors and dropped connections, and
+# reads OPENAI_BASE_URL, OPENAI_ORG_ID and OPENAI_PROJECT_ID as dacp's does.
+_OPENAI_CLIENTS: Dict[Tuple[str, Optional[str]], Any] = {}
+_OPENAI_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_openai_client(intelligence_config: Dict[str, Any]):
+    """Return the pooled openai.OpenAI client for this config, creating it on first use."""
+    key = _openai_client_key(intelligence_config)
+    client = _OPENAI_CLIENTS.get(key)
+    if client is None:
+        with _OPENAI_CLIENTS_LOCK:
+            client = _OPENAI_CLIENTS.get(key)
+            if client is None:
+                import openai
+
+                api_key, base_url = key
+                client = _OPENAI_CLIENTS[key] = openai.OpenAI(
+                    api_key=api_key, base_url=base_url, **_openai_client_options(openai, openai.DefaultHttpxClient)
+                )
+    return client
+
+
+def invoke_intelligence_pooled(prompt: str, intelligence_config: Dict[str, Any]) -> Any:
+    """dacp.invoke_intelligence with OpenAI requests sent over a pooled client."""
+    if not _is_openai(intelligence_config):
+        return invoke_intelligence(prompt, intelligence_config)
+
+    with _logged_intelligence_call(intelligence_config):
+        client = _get_openai_client(intelligence_config)
+        return _openai_content(client.chat.completions.create(**_openai_request(prompt, intelligence_config)))
+
+
+# Pooled async OpenAI clients per event loop. Their httpx clients are bound to the
+# loop they were first used on, so module-wide clients cannot be shared across loops.
+_ASYNC_OPENAI_CLIENTS = weakref.WeakKeyDictionary()
+
+
+async def _close_on_loop_shutdown(loop, clients: Dict[Tuple[str, Optional[str]], Any]):
+    """Hold ``clients`` open until the event loop finalizes its async generators.
+
+    asyncio.run() and loop.shutdown_asyncgens() close every unfinished async
+    generator of the loop, which runs the ``finally`` here on that same loop.
+    The entry is dropped there too, because this generator refers back to its
+    loop and would otherwise keep the weakly keyed entry alive. Loops that are
+    closed without shutdown_asyncgens() never get there; see aclose_clients().
+    """
+    try:
+        yield
+    finally:
+        _ASYNC_OPENAI_CLIENTS.pop(loop, None)
+        for client in clients.values():
+            await client.close()
+
+
+async def _get_async_openai_client(intelligence_config: Dict[str, Any]):
+    """Return the pooled openai.AsyncOpenAI client for this config on the running event loop.
+
+    The loop's clients are closed when asyncio.run() returns or
+    loop.shutdown_asyncgens() is awaited, or earlier by aclose_clients().
+    """
+    key = _openai_client_key(intelligence_config)
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_OPENAI_CLIENTS.get(loop)
+    if entry is None:
+        clients = {}
+        closer = _close_on_loop_shutdown(loop, clients)
+        # Registered before the first await so concurrent callers on this loop share the clients
+        entry = _ASYNC_OPENAI_CLIENTS[loop] = (clients, closer)
+        await closer.__anext__()
+
+    clients = entry[0]
+    client = clients.get(key)
+    if client is None:
+        import openai
+
+        api_key, base_url = key
+        client = clients[key] = openai.AsyncOpenAI(
+            api_key=api_key, base_url=base_url, **_openai_client_options(openai, openai.DefaultAsyncHttpxClient)
+        )
+    return client
+
+
+async def aclose_clients() -> None:
+    """Close the pooled async OpenAI clients of the running event loop.
+
+    asyncio.run() does this on its own. Code that drives a loop by hand with
+    run_until_complete() and then calls loop.close() without awaiting
+    loop.shutdown_asyncgens() must await this first, or the clients' connections
+    are left open. Later calls on the loop open new clients.
+    """
+    entry = _ASYNC_OPENAI_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+
+async def ainvoke_intelligence(prompt: str, intelligence_config: Dict[str, Any]) -> Any:
+    """Async counterpart of dacp.invoke_intelligence.
+
+    OpenAI requests are sent over the loop's pooled client so concurrent calls
+    overlap on the network instead of each holding a thread. Other engines go
+    through the synchronous DACP call in a worker thread.
+    """
+    if not _is_openai(intelligence_config):
+        return await asyncio.to_thread(invoke_intelligence, prompt, intelligence_config)
+
+    with _logged_intelligence_call(intelligence_config):
+        client = await _get_async_openai_client(intelligence_config)
+        return _openai_content(await client.chat.completions.create(**_openai_request(prompt, intelligence_config)))
+
+
+def _required_fields_contract(required_fields: frozenset):
+    """Return a decorator that only checks a task result holds the required output fields."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            fields = result.model_fields_set if isinstance(result, BaseModel) else result.keys()
+            if not required_fields.issubset(fields):
+                raise BehaviouralContractViolationError(
+                    f"{func.__name__} output is missing required fields: {sorted(required_fields.difference(fields))}"
+                )
+            return result
+        return wrapper
+    return decorator
+
+
+def _settled(func, result: Any = None, error: Optional[BaseException] = None):
+    """Return a synchronous stand-in for ``func`` that returns its awaited result or raises its error."""
+    @functools.wraps(func)
+    def settled(*args, **kwargs):
+        if error is not None:
+            raise error
+        return result
+    return settled
+
+
+def task_contract(**contract: Any):
+    """Return the behavioural contract decorator for a task function.
+
+    With ``DACP_SKIP_BEHAVIOURAL_CONTRACT=1`` the per-call contract validation is
+    skipped and only the required output fields are checked, against a set
+    built once here.
+
+    behavioural_contract only wraps synchronous functions, so a coroutine
+    function is awaited first and its outcome is then passed through the same
+    contract with the call's arguments, exactly as a synchronous task's would be.
+    """
+    if os.getenv("DACP_SKIP_BEHAVIOURAL_CONTRACT") != "1":
+        contract_decorator = behavioural_contract(**contract)
+    else:
+        contract_decorator = _required_fields_contract(
+            frozenset(contract["response_contract"]["output_format"]["required_fields"])
+        )
+
+    def decorator(func):
+        if not asyncio.iscoroutinefunction(func):
+            return contract_decorator(func)
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                settled = _settled(func, result=await func(*args, **kwargs))
+            except Exception as e:
+                settled = _settled(func, error=e)
+            return contract_decorator(settled)(*args, **kwargs)
+        return async_wrapper
+    return decorator
+
+
+def parse_llm_output(response: Any, adapter: TypeAdapter, default: BaseModel) -> Tuple[BaseModel, bool]:
+    """Parse an LLM response into an output model the way DACP's parse_with_fallback does.
+
+    Text is parsed and validated by pydantic-core in one pass. Text that does not
+    validate as a whole is searched for JSON wrapped in prose or code fences, and
+    a copy of ``default`` stands in when none validates. Dicts are validated as
+    they are, without a fallback.
+
+    Returns:
+        The output, and whether it is the default rather than a validated response
+
+    Raises:
+        ValueError: If a dict does not validate or the response has any other type
+    """
+    if isinstance(response, type(default)):
+        return response, False
+
+    if isinstance(response, (str, bytes)):
+        try:
+            return adapter.validate_json(response), False
+        except ValidationError:
+            pass
+
+        extracted = extract_json_from_text(response.decode() if isinstance(response, bytes) else response)
+        if isinstance(extracted, dict):
+            try:
+                return adapter.validate_python(extracted), False
+            except ValidationError:
+                pass
+        log.warning("LLM response holds no valid %s, using the default output", type(default).__name__)
+        return default.model_copy(deep=True), True
+
+    if isinstance(response, dict):
+        try:
+            return adapter.validate_python(response), False
+        except ValidationError as e:
+            raise ValueError(f'Error parsing response with DACP parser: {e}') from e
+    raise ValueError(f'Error parsing response with DACP parser: unable to parse response of type {type(response).__name__}')
+
+
+# Memory settings rendered into every prompt; memory is disabled for all agents
+MEMORY_CONFIG = MappingProxyType({
+    "enabled": False,
+    "format": "string",
+    "usage": "prompt-append",
+    "required": False,
+    "description": ""
+})
+
+
+# Prompt templates are loaded on first use. jinja2 is imported lazily so that
+# importing an agent does not pay for it until a prompt is actually rendered.
+
+@functools.lru_cache(maxsize=None)
+def _prompt_environment(prompts_dir: Path):
+    """Build the Jinja2 environment of an agent's prompts/ directory, with an on-disk bytecode cache.
+
+    DACP_JINJA_CACHE_DIR points the bytecode cache at a persistent directory
+    (e.g. a mounted CI cache volume); otherwise Jinja's per-user temp directory
+    is used. Templates are looked up in ``prompts_dir``, after
+    DACP_TEMPLATE_OVERRIDE_DIR when it is set.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    cache_dir = os.getenv("DACP_JINJA_CACHE_DIR")
+    bytecode_cache = FileSystemBytecodeCache()
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(directory=cache_dir)
+        except OSError as e:
+            log.warning("Template bytecode cache disabled, cannot create %s: %s", cache_dir, e)
+            bytecode_cache = None
+
+    override_dir = os.getenv("DACP_TEMPLATE_OVERRIDE_DIR")
+    return Environment(
+        loader=FileSystemLoader([override_dir, prompts_dir] if override_dir else prompts_dir),
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=bytecode_cache
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt_template(prompts_dir: Path, name: str):
+    """Load a task-specific prompt template, falling back to the default template.
+
+    Each template is resolved once per process, so a missing one is logged a
+    single time instead of on every task call.
+    """
+    from jinja2 import TemplateNotFound
+
+    env = _prompt_environment(prompts_dir)
+    try:
+        return env.get_template(name)
+    except TemplateNotFound:
+        log.warning("Task-specific prompt template %s not found, using default template", name)
+        return env.get_template("agent_prompt.jinja2")
+
+
+@functools.lru_cache(maxsize=None)
+def load_split_prompt_template(prompts_dir: Path, prefix_name: str, body_name: str) -> Tuple[str, Any]:
+    """Load a prompt split into a static prefix, rendered here once, and a per-call body.
+
+    Returns the rendered prefix and the body template. If either part is missing
+    the default template renders the whole prompt and the prefix is empty.
+    """
+    from jinja2 import TemplateNotFound
+
+    env = _prompt_environment(prompts_dir)
+    try:
+        return env.get_template(prefix_name).render(), env.get_template(body_name)
+    except TemplateNotFound as e:
+        log.warning("Task-specific prompt template %s not found, using default template", e.name)
+        return "", env.get_template("agent_prompt.jinja2")
+
+
+def render_prompt(template, input_dict: Dict[str, Any], output_format: str, memory_summary: str = '', **context: Any) -> str:
+    """Render a task prompt from a single context dict.
+
+    Task templates read the input values directly, the default template iterates
+    over ``input``. Extra ``context`` values are passed to the template as well.
+    """
+    return template.render({
+        **input_dict,
+        "input": input_dict,
+        "memory_summary": memory_summary if MEMORY_CONFIG["enabled"] else '',
+        "output_format": output_format,
+        "memory_config": MEMORY_CONFIG,
+        **context
+    })
+
+
+@functools.lru_cache(maxsize=8)
+def ensure_log_dir(log_file: str) -> None:
+    """Create the parent directory of a log file once per process."""
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+
+
+def freeze_config(defaults: Mapping[str, Any], overrides: Mapping[str, Any]) -> MappingProxyType:
+    """Deep-merge overrides into defaults and return a read-only nested mapping."""
+    merged = {**defaults, **overrides}
+    for key, value in merged.items():
+        if isinstance(value, Mapping):
+            base = defaults.get(key) if key in overrides else None
+            merged[key] = freeze_config(base if isinstance(base, Mapping) else {}, value)
+    return MappingProxyType(merged)
+
+
+def is_contract_fallback(result: Any) -> bool:
+    """Whether a task result is the behavioural contract's fallback dict rather than a task output."""
+    return isinstance(result, dict) and "error" in result
+
+
+def as_dict(result) -> dict:
+    """Return a task result as a plain dict, whether it is a Pydantic model or already a dict."""
+    if hasattr(result, 'model_dump'):
+        return result.model_dump()
+    return result
+
+
+class BaseDacpAgent(dacp.Agent):
+    """Message handling and logging setup shared by the generated DACP agents.
+
+    Subclasses declare only the config values that differ from _DEFAULT_CONFIG
+    in _CONFIG_OVERRIDES. The merged config is built once per class and every
+    instance shares it read-only. The dispatch tables and the parameter names of
+    each task are resolved once from the task names in _TASKS.
+    """
+
+    _DEFAULT_CONFIG = {
+        "logging": {
+            "enabled": True,
+            "level": "INFO",
+            "format_style": "emoji",
+            "include_timestamp": True,
+            "log_file": None,
+            "env_overrides": {
+                "level": "DACP_LOG_LEVEL",
+                "format_style": "DACP_LOG_STYLE"
+            }
+        },
+        "intelligence": {
+            "engine": "openai",
+            "endpoint": "https://api.openai.com/v1"
+        }
+    }
+    _CONFIG_OVERRIDES: Dict[str, Any] = {}
+    _TASKS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._CONFIG = cls._build_config()
+
+        # Task names are accepted with underscores or hyphens
+        aliases = {alias: name for name in cls._TASKS for alias in (name, name.replace("_", "-"))}
+        cls._TASK_METHODS = {alias: getattr(cls, name) for alias, name in aliases.items()}
+        cls._ASYNC_DISPATCH = {alias: getattr(cls, f"{name}_async") for alias, name in aliases.items()}
+        cls._TASK_PARAMS = {
+            alias: frozenset(inspect.signature(getattr(cls, name)).parameters) - {"self"}
+            for alias, name in aliases.items()
+        }
+
+    @classmethod
+    def _build_config(cls) -> MappingProxyType:
+        return freeze_config(cls._DEFAULT_CONFIG, cls._CONFIG_OVERRIDES)
+
+    def __init__(self, agent_id: str, orchestrator: Orchestrator):
+        super().__init__()
+        self.agent_id = agent_id
+        orchestrator.register_agent(agent_id, self)
+        self.config = self._CONFIG
+        self.model = self.config["intelligence"]["model"]
+
+        # Setup DACP logging FIRST
+        self.setup_logging()
+
+
+    def _task_params(self, task: str, message: dict) -> dict:
+        """Pick the parameters of a task out of an orchestrator message."""
+        return {k: message[k] for k in self._TASK_PARAMS[task] if k in message}
+
+
+    def handle_message(self, message: dict) -> dict:
+        """
+        Handles incoming messages from the orchestrator.
+        Processes messages based on the task specified and routes to appropriate agent methods.
+        """
+        task = message.get("task")
+        if not task:
+            return {"error": "Missing required field: task"}
+
+        # Only the declared tasks are dispatchable
+        method = self._TASK_METHODS.get(task)
+        if method is None:
+            return {"error": f"Unknown task: {task}"}
+
+        try:
+            # Call the method with the message fields it accepts; other keys are ignored
+            return as_dict(method(self, **self._task_params(task, message)))
+
+        except TypeError as e:
+            return {"error": f"Invalid parameters for task {task}: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Error executing task {task}: {str(e)}"}
+
+
+    async def handle_message_async(self, message: dict) -> dict:
+        """
+        Async counterpart of handle_message for orchestrators running an event loop.
+        LLM calls are awaited, so concurrent messages overlap instead of each blocking a thread.
+        Loops closed without shutdown_asyncgens() should await aclose_clients() first.
+        """
+        task = message.get("task")
+        if not task:
+            return {"error": "Missing required field: task"}
+
+        method = self._ASYNC_DISPATCH.get(task)
+        if method is None:
+            return {"error": f"Unknown task: {task}"}
+
+        try:
+            return as_dict(await method(self, **self._task_params(task, message)))
+
+        except TypeError as e:
+            return {"error": f"Invalid parameters for task {task}: {str(e)}"}
+        except Exception as e:
+            return {"error": f"Error executing task {task}: {str(e)}"}
+
+
+
+    def setup_logging(self):
+        """Configure DACP logging from YAML configuration."""
+        logging_config = self.config.get('logging', {})
+
+        if not logging_config.get('enabled', True):
+            return
+
+        # Process environment variable overrides
+        env_overrides = logging_config.get('env_overrides', {})
+
+        level = logging_config.get('level', 'INFO')
+        if 'level' in env_overrides:
+            level = os.getenv(env_overrides['level'], level)
+
+        format_style = logging_config.get('format_style', 'emoji')
+        if 'format_style' in env_overrides:
+            format_style = os.getenv(env_overrides['format_style'], format_style)
+
+        log_file = logging_config.get('log_file')
+        if 'log_file' in env_overrides:
+            log_file = os.getenv(env_overrides['log_file'], log_file)
+
+        # Create log directory if needed
+        if log_file:
+            ensure_log_dir(log_file)
+
+        # Configure DACP logging
+        dacp.setup_dacp_logging(
+            level=level,
+            format_style=format_style,
+            include_timestamp=logging_config.get('include_timestamp', True),
+            log_file=log_file
+        )
@@ -1,52 +1,134 @@
-import os
+import sys
+import asyncio
 import logging
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Any, Dict, List
-from jinja2 import Environment, FileSystemLoader
-from pydantic import BaseModel
-from behavioural_contracts import behavioural_contract
+from typing import Optional, Any, Annotated, Dict, List, Literal, get_args
+from pydantic import BaseModel, BeforeValidator, ConfigDict, TypeAdapter
 from dotenv import load_dotenv
 
-import dacp
-from dacp import parse_with_fallback, invoke_intelligence
-from dacp.orchestrator import Orchestrator
-
 load_dotenv()
 
 log = logging.getLogger(__name__)
 
+# Resolved once at import; prompt templates are looked up relative to this module
+_MODULE_DIR = Path(__file__).resolve().parent
+_PROMPTS_DIR = _MODULE_DIR / "prompts"
+
+# Code shared by the agents lives in agents/dacp_agent_common.py. Agents are
+# loaded by file path, so the agents directory is put on sys.path to import it.
+if str(_MODULE_DIR.parent) not in sys.path:
+    sys.path.append(str(_MODULE_DIR.parent))
+
+from dacp_agent_common import (  # noqa: E402
+    LLM_CACHE,
+    BaseDacpAgent,
+    ainvoke_intelligence,
+    as_dict,
+    invoke_intelligence_pooled,
+    is_contract_fallback,
+    json_dumps_pretty,
+    llm_cached,
+    load_prompt_template,
+    load_split_prompt_template,
+    parse_llm_output,
+    render_prompt,
+    task_contract,
+)
+
 ROLE = "Github_Actions_Error_Analyzer"
 
+# Output models are immutable and ignore unknown keys, so validation never
+# has to track extras and instances can be shared safely
+_OUTPUT_MODEL_CONFIG = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
+def _closed_set(choices: Any) -> Any:
+    """Return ``choices``, a Literal type, with LLM spellings normalized before the lookup.
+
+    Values are lower-cased with spaces and hyphens turned into underscores, so
+    "High" or "very high" match. A value that is only the first word of a choice
+    ("dependency", "permissions") is coerced to that choice with a warning. Any
+    other value fails validation, so an unexpected answer such as "urgent" is
+    reported as a fallback rather than passed off as a valid one.
+    """
+    values = frozenset(get_args(choices))
+    first_words = {value.split("_")[0].removesuffix("s"): value for value in values}
+
+    def normalize(value: Any) -> Any:
+        if not isinstance(value, str) or value in values:
+            return value
+        normalized = value.strip().lower().replace("-", "_").replace(" ", "_")
+        if normalized in values:
+            return normalized
+        alias = first_words.get(normalized.removesuffix("s"))
+        if alias is None:
+            return value
+        log.warning("Coerced LLM value %r to %r", value, alias)
+        return alias
+
+    return Annotated[choices, BeforeValidator(normalize)]
+
+
+# Closed value sets from the agent spec, validated as Literal lookups
+UrgencyLevel = _closed_set(Literal["low", "medium", "high", "critical"])
+ErrorCategory = _closed_set(Literal[
+    "configuration_issue",
+    "dependency_problem",
+    "code_issue",
+    "environment_issue",
+    "infrastructure_issue",
+    "permissions_issue",
+    "timing_issue",
+    "resource_issue"
+])
+ConfidenceLevel = _closed_set(Literal["low", "medium", "high", "very_high"])
+FixType = _closed_set(Literal["immediate", "short_term", "long_term"])
+EffortLevel = _closed_set(Literal["low", "medium", "high"])
+ChangeType = _closed_set(Literal["add", "modify", "remove", "rename"])
+CommentType = _closed_set(Literal["error_analysis", "fix_suggestion", "workflow_failure"])
+ImprovementType = _closed_set(Literal[
+    "error_handling",
+    "caching",
+    "parallelization",
+    "monitoring",
+    "configuration"
+])
+ImplementationDifficulty = _closed_set(Literal["easy", "moderate", "hard"])
+BenefitLevel = _closed_set(Literal["low", "medium", "high"])
+
 # Generate output models
 class Analyze_ErrorOutputAnalysis_Result(BaseModel):
     """Clear explanation of what caused the error"""
     root_cause: str
-    error_category: str
+    error_category: ErrorCategory
     """Confidence in the root cause analysis"""
-    confidence_level: str
+    confidence_level: ConfidenceLevel
     """Assessment of the impact on the development workflow"""
     impact_assessment: str
+    model_config = _OUTPUT_MODEL_CONFIG
 class Analyze_ErrorOutputRecommended_FixesItemCode_ChangesItem(BaseModel):
     file_path: Optional[str] = None
     suggested_change: Optional[str] = None
-    change_type: Optional[str] = None
+    change_type: Optional[ChangeType] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Analyze_ErrorOutputRecommended_FixesItem(BaseModel):
     """Short title for the fix"""
     fix_title: str
     """Detailed description of the fix"""
     fix_description: str
-    fix_type: str
-    estimated_effort: str
+    fix_type: FixType
+    estimated_effort: EffortLevel
     """Specific code changes needed"""
     code_changes: Optional[List[Analyze_ErrorOutputRecommended_FixesItemCode_ChangesItem]] = None
     """Commands to execute for the fix"""
     commands_to_run: Optional[List[str]] = None
     """Prerequisites for this fix"""
     prerequisites: Optional[List[str]] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Analyze_ErrorOutputDeveloper_MessageRelated_DocumentationItem(BaseModel):
     title: Optional[str] = None
     url: Optional[str] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Analyze_ErrorOutputDeveloper_Message(BaseModel):
     """Brief summary for the developer"""
     summary: str
@@ -57,128 +139,100 @@ class Analyze_ErrorOutputDeveloper_Message(BaseModel):
     related_documentation: Optional[List[Analyze_ErrorOutputDeveloper_MessageRelated_DocumentationItem]] = None
     """Tips to prevent similar issues in the future"""
     prevention_tips: Optional[List[str]] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Analyze_ErrorOutput(BaseModel):
     analysis_result: Analyze_ErrorOutputAnalysis_Result
     recommended_fixes: List[Analyze_ErrorOutputRecommended_FixesItem]
     developer_message: Analyze_ErrorOutputDeveloper_Message
     """How urgently this needs to be addressed"""
-    urgency_level: str
+    urgency_level: UrgencyLevel
+    model_config = _OUTPUT_MODEL_CONFIG
 
 class Generate_Pr_CommentOutputComment_Metadata(BaseModel):
-    comment_type: str
+    comment_type: CommentType
     """Tags for categorizing the comment"""
     tags: List[str]
-    urgency: str
+    urgency: UrgencyLevel
+    model_config = _OUTPUT_MODEL_CONFIG
 class Generate_Pr_CommentOutput(BaseModel):
     """Formatted markdown comment for GitHub PR"""
     pr_comment: str
     comment_metadata: Generate_Pr_CommentOutputComment_Metadata
+    model_config = _OUTPUT_MODEL_CONFIG
 
 class Suggest_Workflow_ImprovementsOutputWorkflow_ImprovementsItem(BaseModel):
     improvement_title: str
     improvement_description: str
-    improvement_type: str
-    implementation_difficulty: str
-    expected_benefit: str
+    improvement_type: ImprovementType
+    implementation_difficulty: ImplementationDifficulty
+    expected_benefit: BenefitLevel
     """Specific YAML changes needed"""
     workflow_changes: Optional[str] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Suggest_Workflow_ImprovementsOutput(BaseModel):
     workflow_improvements: List[Suggest_Workflow_ImprovementsOutputWorkflow_ImprovementsItem]
     """General strategies to prevent similar issues"""
     prevention_strategies: List[str]
     """Recommendations for better monitoring"""
     monitoring_recommendations: List[str]
+    model_config = _OUTPUT_MODEL_CONFIG
+
+
+# Default outputs used when a response cannot be validated. They are validated
+# once at import like any response, so a schema change that the defaults no
+# longer satisfy fails on import rather than on the first fallback.
+_ANALYZE_ERROR_DEFAULT = Analyze_ErrorOutput.model_validate({
+    "analysis_result": {
+        "root_cause": "default_root_cause",
+        "error_category": "code_issue",
+        "confidence_level": "low",
+        "impact_assessment": "default_impact_assessment"
+    },
+    "recommended_fixes": [],
+    "developer_message": {
+        "summary": "default_summary",
+        "detailed_explanation": "default_detailed_explanation",
+        "next_steps": [],
+        "related_documentation": [],
+        "prevention_tips": []
+    },
+    "urgency_level": "medium"
+})
+_GENERATE_PR_COMMENT_DEFAULT = Generate_Pr_CommentOutput.model_validate({
+    "pr_comment": "formatted_default",
+    "comment_metadata": {
+        "comment_type": "error_analysis",
+        "tags": [],
+        "urgency": "medium"
+    }
+})
+_SUGGEST_WORKFLOW_IMPROVEMENTS_DEFAULT = Suggest_Workflow_ImprovementsOutput.model_validate({
+    "workflow_improvements": [],
+    "prevention_strategies": [],
+    "monitoring_recommendations": []
+})
 
 
-# Task functions
-
-def parse_analyze_error_output(response) -> Analyze_ErrorOutput:
-    """Parse LLM response into Analyze_ErrorOutput using DACP's enhanced parser.
-
-    Args:
-        response: Raw response from the LLM (str or dict)
-
-    Returns:
-        Parsed and validated Analyze_ErrorOutput instance
-
-    Raises:
-        ValueError: If the response cannot be parsed
-    """
-    if isinstance(response, Analyze_ErrorOutput):
-        return response
-
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "analysis_result": {
-                "root_cause": "default_root_cause",
-                "error_category": "default_error_category",
-                "confidence_level": "default_confidence_level",
-                "impact_assessment": "default_impact_assessment"
-            },
-            "recommended_fixes": [],
-            "developer_message": {
-                "summary": "default_summary",
-                "detailed_explanation": "default_detailed_explanation",
-                "next_steps": [],
-                "related_documentation": [],
-                "prevention_tips": []
-            },
-            "urgency_level": "how_default"
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Analyze_ErrorOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
-
-
-@behavioural_contract(
-    version="0.1.2",
-    description="Analyze structured error data and provide developer-friendly explanations",
-    role="analyst",
-    behavioural_flags={"conservatism": "moderate", "verbosity": "comprehensive"},
-    response_contract={"output_format": {"required_fields": ["analysis_result", "recommended_fixes", "developer_message", "urgency_level"]}}
-)
-def analyze_error(error_summary: Dict[str, Any], job_context: Dict[str, Any], log_statistics: Dict[str, Any], additional_context: Dict[str, Any], memory_summary: str = '') -> Analyze_ErrorOutput:
-    """Process analyze_error task.
+# Validators compiled once and reused by every parse_*_output call
+_ANALYZE_ERROR_ADAPTER = TypeAdapter(Analyze_ErrorOutput)
+_GENERATE_PR_COMMENT_ADAPTER = TypeAdapter(Generate_Pr_CommentOutput)
+_SUGGEST_WORKFLOW_IMPROVEMENTS_ADAPTER = TypeAdapter(Suggest_Workflow_ImprovementsOutput)
 
-    Args:
-        error_summary: {'type': 'object', 'properties': {'primary_error': {'type': 'string', 'description': 'The main error message extracted from logs'}, 'error_type': {'type': 'string', 'enum': ['build_failure', 'test_failure', 'dependency_error', 'syntax_error', 'runtime_error', 'timeout', 'permission_error', 'network_error', 'configuration_error', 'deployment_error', 'linting_error', 'other']}, 'severity': {'type': 'string', 'enum': ['low', 'medium', 'high', 'critical']}, 'affected_files': {'type': 'array', 'items': {'type': 'string'}, 'description': 'List of files mentioned in the error'}, 'stack_trace': {'type': 'string', 'description': 'Cleaned and formatted stack trace if available'}, 'error_context': {'type': 'string', 'description': 'Context around the error (before/after lines)'}, 'suggested_keywords': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Keywords for further analysis'}}, 'required': ['primary_error', 'error_type', 'severity']}
-        job_context: {'type': 'object', 'properties': {'job_name': {'type': 'string'}, 'workflow_name': {'type': 'string'}, 'repository': {'type': 'string'}, 'branch': {'type': 'string'}, 'commit_sha': {'type': 'string'}, 'pr_number': {'type': 'integer'}, 'failed_step': {'type': 'string'}}, 'required': ['job_name', 'workflow_name', 'repository']}
-        log_statistics: {'type': 'object', 'properties': {'total_lines': {'type': 'integer'}, 'error_lines': {'type': 'integer'}, 'warning_lines': {'type': 'integer'}, 'duration_estimate': {'type': 'string', 'description': 'Estimated job duration before failure'}}, 'required': ['total_lines', 'error_lines', 'warning_lines']}
-        additional_context: {'type': 'object', 'properties': {'recent_changes': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Recent file changes or commits'}, 'build_commands': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Build commands that were executed'}, 'dependencies': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Dependencies mentioned in the build'}, 'environment_info': {'type': 'object', 'description': 'Environment information'}}}
-        memory_summary: Optional memory context for the task
-
-    Returns:
-        Analyze_ErrorOutput
-    """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
-    }
+# Intelligence configuration shared by every call
+_INTELLIGENCE_CONFIG = {
+    "engine": "openai",
+    "model": "gpt-4",
+    "endpoint": "https://api.openai.com/v1",
+    "temperature": 0.3,
+    "max_tokens": 2000
+}
 
-    # Define output format description
-    output_format = """
+_ANALYZE_ERROR_OUTPUT_FORMAT = """
 - analysis_result (required): object
   - root_cause (required): string
     Clear explanation of what caused the error
-  - error_category (required): string
-  - confidence_level (required): string
+  - error_category (required): string, one of: configuration_issue, dependency_problem, code_issue, environment_issue, infrastructure_issue, permissions_issue, timing_issue, resource_issue
+  - confidence_level (required): string, one of: low, medium, high, very_high
     Confidence in the root cause analysis
   - impact_assessment (required): string
     Assessment of the impact on the development workflow
@@ -188,14 +242,14 @@ def analyze_error(error_summary: Dict[str, Any], job_context: Dict[str, Any], lo
       Short title for the fix
     - fix_description (required): string
       Detailed description of the fix
-    - fix_type (required): string
-    - estimated_effort (required): string
+    - fix_type (required): string, one of: immediate, short_term, long_term
+    - estimated_effort (required): string, one of: low, medium, high
     - code_changes (optional): array of objects
       Specific code changes needed
       Each item contains:
         - file_path (optional): string
         - suggested_change (optional): string
-        - change_type (optional): string
+        - change_type (optional): string, one of: add, modify, remove, rename
     - commands_to_run (optional): array of strings
       Commands to execute for the fix
     - prerequisites (optional): array of strings
@@ -213,96 +267,166 @@ def analyze_error(error_summary: Dict[str, Any], job_context: Dict[str, Any], lo
       - url (optional): string
   - prevention_tips (optional): array of strings
     Tips to prevent similar issues in the future
-- urgency_level (required): string
+- urgency_level (required): string, one of: low, medium, high, critical
   How urgently this needs to be addressed
 """
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"analyze_error.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
+_GENERATE_PR_COMMENT_OUTPUT_FORMAT = """
+- pr_comment (required): string
+  Formatted markdown comment for GitHub PR
+- comment_metadata (required): object
+  - comment_type (required): string, one of: error_analysis, fix_suggestion, workflow_failure
+  - tags (required): array of strings
+    Tags for categorizing the comment
+  - urgency (required): string, one of: low, medium, high, critical
+"""
+
+_SUGGEST_WORKFLOW_IMPROVEMENTS_OUTPUT_FORMAT = """
+- workflow_improvements (required): array of objects
+  Each item contains:
+    - improvement_title (required): string
+    - improvement_description (required): string
+    - improvement_type (required): string, one of: error_handling, caching, parallelization, monitoring, configuration
+    - implementation_difficulty (required): string, one of: easy, moderate, hard
+    - expected_benefit (required): string, one of: low, medium, high
+    - workflow_changes (optional): string
+      Specific YAML changes needed
+- prevention_strategies (required): array of strings
+  General strategies to prevent similar issues
+- monitoring_recommendations (required): array of strings
+  Recommendations for better monitoring
+"""
+
+
+# Task functions
+
+def parse_analyze_error_output(response) -> Analyze_ErrorOutput:
+    """Parse LLM response into Analyze_ErrorOutput using DACP's enhanced parser.
+
+    Args:
+        response: Raw response from the LLM (str, bytes or dict)
+
+    Returns:
+        Parsed and validated Analyze_ErrorOutput instance, or the default output
+        if a text response holds no valid JSON
+
+    Raises:
+        ValueError: If a dict response does not validate or the response has another type
+    """
+    return parse_llm_output(response, _ANALYZE_ERROR_ADAPTER, _ANALYZE_ERROR_DEFAULT)[0]
+
+
+@llm_cached(_ANALYZE_ERROR_ADAPTER, _ANALYZE_ERROR_DEFAULT)
+def _invoke_analyze_error(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
+
+
+@llm_cached(_ANALYZE_ERROR_ADAPTER, _ANALYZE_ERROR_DEFAULT)
+async def _ainvoke_analyze_error(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
+
+
+def _build_analyze_error_prompt(error_summary: Dict[str, Any], job_context: Dict[str, Any], log_statistics: Dict[str, Any], additional_context: Dict[str, Any], memory_summary: str = '') -> str:
+    """Render the analyze_error prompt shared by the sync and async entry points."""
+    # Render the prompt template after its prerendered instructions
+    prefix, template = load_split_prompt_template(_PROMPTS_DIR, "analyze_error_prefix.jinja2", "analyze_error_body.jinja2")
 
     # Create input dictionary for template
     input_dict = {
         "error_summary": error_summary, "job_context": job_context, "log_statistics": log_statistics, "additional_context": additional_context
     }
 
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
-    )
-
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-4",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.3,
-    "max_tokens": 2000
+    # Render the prompt with all necessary context
+    return prefix + render_prompt(template, input_dict, _ANALYZE_ERROR_OUTPUT_FORMAT, memory_summary=memory_summary)
+
+
+# Behavioural contract enforced on both analyze_error and its async variant
+_ANALYZE_ERROR_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Analyze structured error data and provide developer-friendly explanations",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "moderate", "verbosity": "comprehensive"},
+    "response_contract": {"output_format": {"required_fields": ["analysis_result", "recommended_fixes", "developer_message", "urgency_level"]}}
 }
 
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_analyze_error_output(result)
+
+@task_contract(**_ANALYZE_ERROR_CONTRACT)
+def analyze_error(error_summary: Dict[str, Any], job_context: Dict[str, Any], log_statistics: Dict[str, Any], additional_context: Dict[str, Any], memory_summary: str = '') -> Analyze_ErrorOutput:
+    """Process analyze_error task.
+
+    Args:
+        error_summary: {'type': 'object', 'properties': {'primary_error': {'type': 'string', 'description': 'The main error message extracted from logs'}, 'error_type': {'type': 'string', 'enum': ['build_failure', 'test_failure', 'dependency_error', 'syntax_error', 'runtime_error', 'timeout', 'permission_error', 'network_error', 'configuration_error', 'deployment_error', 'linting_error', 'other']}, 'severity': {'type': 'string', 'enum': ['low', 'medium', 'high', 'critical']}, 'affected_files': {'type': 'array', 'items': {'type': 'string'}, 'description': 'List of files mentioned in the error'}, 'stack_trace': {'type': 'string', 'description': 'Cleaned and formatted stack trace if available'}, 'error_context': {'type': 'string', 'description': 'Context around the error (before/after lines)'}, 'suggested_keywords': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Keywords for further analysis'}}, 'required': ['primary_error', 'error_type', 'severity']}
+        job_context: {'type': 'object', 'properties': {'job_name': {'type': 'string'}, 'workflow_name': {'type': 'string'}, 'repository': {'type': 'string'}, 'branch': {'type': 'string'}, 'commit_sha': {'type': 'string'}, 'pr_number': {'type': 'integer'}, 'failed_step': {'type': 'string'}}, 'required': ['job_name', 'workflow_name', 'repository']}
+        log_statistics: {'type': 'object', 'properties': {'total_lines': {'type': 'integer'}, 'error_lines': {'type': 'integer'}, 'warning_lines': {'type': 'integer'}, 'duration_estimate': {'type': 'string', 'description': 'Estimated job duration before failure'}}, 'required': ['total_lines', 'error_lines', 'warning_lines']}
+        additional_context: {'type': 'object', 'properties': {'recent_changes': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Recent file changes or commits'}, 'build_commands': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Build commands that were executed'}, 'dependencies': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Dependencies mentioned in the build'}, 'environment_info': {'type': 'object', 'description': 'Environment information'}}}
+        memory_summary: Optional memory context for the task
+
+    Returns:
+        Analyze_ErrorOutput
+    """
+    prompt = _build_analyze_error_prompt(error_summary, job_context, log_statistics, additional_context, memory_summary=memory_summary)
+
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    return _invoke_analyze_error(prompt, _INTELLIGENCE_CONFIG)
+
+
+@task_contract(**_ANALYZE_ERROR_CONTRACT)
+async def analyze_error_async(error_summary: Dict[str, Any], job_context: Dict[str, Any], log_statistics: Dict[str, Any], additional_context: Dict[str, Any], memory_summary: str = '') -> Analyze_ErrorOutput:
+    """Async variant of analyze_error that awaits the LLM call instead of blocking a thread."""
+    prompt = _build_analyze_error_prompt(error_summary, job_context, log_statistics, additional_context, memory_summary=memory_summary)
+    return await _ainvoke_analyze_error(prompt, _INTELLIGENCE_CONFIG)
 
 
 def parse_generate_pr_comment_output(response) -> Generate_Pr_CommentOutput:
     """Parse LLM response into Generate_Pr_CommentOutput using DACP's enhanced parser.
 
     Args:
-        response: Raw response from the LLM (str or dict)
+        response: Raw response from the LLM (str, bytes or dict)
 
     Returns:
-        Parsed and validated Generate_Pr_CommentOutput instance
+        Parsed and validated Generate_Pr_CommentOutput instance, or the default output
+        if a text response holds no valid JSON
 
     Raises:
-        ValueError: If the response cannot be parsed
+        ValueError: If a dict response does not validate or the response has another type
     """
-    if isinstance(response, Generate_Pr_CommentOutput):
-        return response
-
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "pr_comment": "formatted_default",
-            "comment_metadata": {
-                "comment_type": "default_comment_type",
-                "tags": [],
-                "urgency": "default_urgency"
-            }
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Generate_Pr_CommentOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
+    return parse_llm_output(response, _GENERATE_PR_COMMENT_ADAPTER, _GENERATE_PR_COMMENT_DEFAULT)[0]
 
 
-@behavioural_contract(
-    version="0.1.2",
-    description="Generate a formatted comment for posting to a GitHub PR",
-    role="analyst",
-    behavioural_flags={"conservatism": "moderate", "verbosity": "comprehensive"},
-    response_contract={"output_format": {"required_fields": ["pr_comment", "comment_metadata"]}}
-)
+@llm_cached(_GENERATE_PR_COMMENT_ADAPTER, _GENERATE_PR_COMMENT_DEFAULT)
+def _invoke_generate_pr_comment(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
+
+
+@llm_cached(_GENERATE_PR_COMMENT_ADAPTER, _GENERATE_PR_COMMENT_DEFAULT)
+async def _ainvoke_generate_pr_comment(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
+
+
+def _build_generate_pr_comment_prompt(analysis_result: Dict[str, Any], recommended_fixes: List[Any], developer_message: Dict[str, Any], pr_number: int, repository: str, job_name: str, workflow_name: str, memory_summary: str = '') -> str:
+    """Render the generate_pr_comment prompt shared by the sync and async entry points."""
+    template = load_prompt_template(_PROMPTS_DIR, "generate_pr_comment.jinja2")
+
+    # Create input dictionary for template
+    input_dict = {
+        "analysis_result": analysis_result, "recommended_fixes": recommended_fixes, "developer_message": developer_message, "pr_number": pr_number, "repository": repository, "job_name": job_name, "workflow_name": workflow_name
+    }
+
+    # Render the prompt with all necessary context
+    return render_prompt(template, input_dict, _GENERATE_PR_COMMENT_OUTPUT_FORMAT, memory_summary=memory_summary)
+
+
+# Behavioural contract enforced on both generate_pr_comment and its async variant
+_GENERATE_PR_COMMENT_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Generate a formatted comment for posting to a GitHub PR",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "moderate", "verbosity": "comprehensive"},
+    "response_contract": {"output_format": {"required_fields": ["pr_comment", "comment_metadata"]}}
+}
+
+
+@task_contract(**_GENERATE_PR_COMMENT_CONTRACT)
 def generate_pr_comment(analysis_result: Dict[str, Any], recommended_fixes: List[Any], developer_message: Dict[str, Any], pr_number: int, repository: str, job_name: str, workflow_name: str, memory_summary: str = '') -> Generate_Pr_CommentOutput:
     """Process generate_pr_comment task.
 
@@ -319,294 +443,118 @@ def generate_pr_comment(analysis_result: Dict[str, Any], recommended_fixes: List
     Returns:
         Generate_Pr_CommentOutput
     """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
-    }
+    prompt = _build_generate_pr_comment_prompt(analysis_result, recommended_fixes, developer_message, pr_number, repository, job_name, workflow_name, memory_summary=memory_summary)
 
-    # Define output format description
-    output_format = """
-- pr_comment (required): string
-  Formatted markdown comment for GitHub PR
-- comment_metadata (required): object
-  - comment_type (required): string
-  - tags (required): array of strings
-    Tags for categorizing the comment
-  - urgency (required): string
-"""
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    return _invoke_generate_pr_comment(prompt, _INTELLIGENCE_CONFIG)
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"generate_pr_comment.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
 
-    # Create input dictionary for template
-    input_dict = {
-        "analysis_result": analysis_result, "recommended_fixes": recommended_fixes, "developer_message": developer_message, "pr_number": pr_number, "repository": repository, "job_name": job_name, "workflow_name": workflow_name
-    }
-
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
-    )
-
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-4",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.3,
-    "max_tokens": 2000
-}
-
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_generate_pr_comment_output(result)
+@task_contract(**_GENERATE_PR_COMMENT_CONTRACT)
+async def generate_pr_comment_async(analysis_result: Dict[str, Any], recommended_fixes: List[Any], developer_message: Dict[str, Any], pr_number: int, repository: str, job_name: str, workflow_name: str, memory_summary: str = '') -> Generate_Pr_CommentOutput:
+    """Async variant of generate_pr_comment that awaits the LLM call instead of blocking a thread."""
+    prompt = _build_generate_pr_comment_prompt(analysis_result, recommended_fixes, developer_message, pr_number, repository, job_name, workflow_name, memory_summary=memory_summary)
+    return await _ainvoke_generate_pr_comment(prompt, _INTELLIGENCE_CONFIG)
 
 
 def parse_suggest_workflow_improvements_output(response) -> Suggest_Workflow_ImprovementsOutput:
     """Parse LLM response into Suggest_Workflow_ImprovementsOutput using DACP's enhanced parser.
 
     Args:
-        response: Raw response from the LLM (str or dict)
+        response: Raw response from the LLM (str, bytes or dict)
 
     Returns:
-        Parsed and validated Suggest_Workflow_ImprovementsOutput instance
+        Parsed and validated Suggest_Workflow_ImprovementsOutput instance, or the default output
+        if a text response holds no valid JSON
 
     Raises:
-        ValueError: If the response cannot be parsed
+        ValueError: If a dict response does not validate or the response has another type
     """
-    if isinstance(response, Suggest_Workflow_ImprovementsOutput):
-        return response
-
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "workflow_improvements": [],
-            "prevention_strategies": [],
-            "monitoring_recommendations": []
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Suggest_Workflow_ImprovementsOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
+    return parse_llm_output(response, _SUGGEST_WORKFLOW_IMPROVEMENTS_ADAPTER, _SUGGEST_WORKFLOW_IMPROVEMENTS_DEFAULT)[0]
 
 
-@behavioural_contract(
-    version="0.1.2",
-    description="Suggest improvements to the GitHub Actions workflow to prevent similar issues",
-    role="analyst",
-    behavioural_flags={"conservatism": "moderate", "verbosity": "comprehensive"},
-    response_contract={"output_format": {"required_fields": ["workflow_improvements", "prevention_strategies", "monitoring_recommendations"]}}
-)
-def suggest_workflow_improvements(error_analysis: Dict[str, Any], workflow_name: str, repository: str, recurring_patterns: List[Any], memory_summary: str = '') -> Suggest_Workflow_ImprovementsOutput:
-    """Process suggest_workflow_improvements task.
+@llm_cached(_SUGGEST_WORKFLOW_IMPROVEMENTS_ADAPTER, _SUGGEST_WORKFLOW_IMPROVEMENTS_DEFAULT)
+def _invoke_suggest_workflow_improvements(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
 
-    Args:
-        error_analysis: {'type': 'object', 'description': 'Previous analysis result'}
-        workflow_name: {'type': 'string', 'description': 'Name of the workflow'}
-        repository: {'type': 'string', 'description': 'Repository name'}
-        recurring_patterns: {'type': 'array', 'items': {'type': 'string'}, 'description': 'Patterns of recurring issues'}
-        memory_summary: Optional memory context for the task
 
-    Returns:
-        Suggest_Workflow_ImprovementsOutput
-    """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
-    }
+@llm_cached(_SUGGEST_WORKFLOW_IMPROVEMENTS_ADAPTER, _SUGGEST_WORKFLOW_IMPROVEMENTS_DEFAULT)
+async def _ainvoke_suggest_workflow_improvements(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
 
-    # Define output format description
-    output_format = """
-- workflow_improvements (required): array of objects
-  Each item contains:
-    - improvement_title (required): string
-    - improvement_description (required): string
-    - improvement_type (required): string
-    - implementation_difficulty (required): string
-    - expected_benefit (required): string
-    - workflow_changes (optional): string
-      Specific YAML changes needed
-- prevention_strategies (required): array of strings
-  General strategies to prevent similar issues
-- monitoring_recommendations (required): array of strings
-  Recommendations for better monitoring
-"""
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"suggest_workflow_improvements.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
+def _build_suggest_workflow_improvements_prompt(error_analysis: Dict[str, Any], workflow_name: str, repository: str, recurring_patterns: List[Any], memory_summary: str = '') -> str:
+    """Render the suggest_workflow_improvements prompt shared by the sync and async entry points."""
+    template = load_prompt_template(_PROMPTS_DIR, "suggest_workflow_improvements.jinja2")
 
     # Create input dictionary for template
     input_dict = {
         "error_analysis": error_analysis, "workflow_name": workflow_name, "repository": repository, "recurring_patterns": recurring_patterns
     }
 
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
-    )
-
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-4",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.3,
-    "max_tokens": 2000
-}
-
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_suggest_workflow_improvements_output(result)
-
-
-
-class GithubActionsErrorAnalyzerAgent(dacp.Agent):
-    def __init__(self, agent_id: str, orchestrator: Orchestrator):
-        super().__init__()
-        self.agent_id = agent_id
-        orchestrator.register_agent(agent_id, self)
-        self.model = "gpt-4"
-
-        # Embed YAML config as dict during generation
-        self.config = {
-            "logging": {
-                "enabled": True,
-                "level": "INFO",
-                "format_style": "emoji",
-                "include_timestamp": True,
-                "log_file": "./logs/github-actions-analyzer.log",
-                "env_overrides": {
-                    "level": "DACP_LOG_LEVEL",
-                    "format_style": "DACP_LOG_STYLE",
-                    "log_file": "DACP_LOG_FILE_ANALYZER"
-                }
-            },
-            "intelligence": {
-                "engine": "openai",
-                "model": "gpt-4",
-                "endpoint": "https://api.openai.com/v1",
-                "config": {
-                    "temperature": 0.3,
-                    "max_tokens": 2000
-                }
-            }
-        }
-
-        # Setup DACP logging FIRST
-        self.setup_logging()
-
+    # Render the prompt with all necessary context
+    return render_prompt(template, input_dict, _SUGGEST_WORKFLOW_IMPROVEMENTS_OUTPUT_FORMAT, memory_summary=memory_summary)
 
-    def handle_message(self, message: dict) -> dict:
-        """
-        Handles incoming messages from the orchestrator.
-        Processes messages based on the task specified and routes to appropriate agent methods.
-        """
-        task = message.get("task")
-        if not task:
-            return {"error": "Missing required field: task"}
-
-        # Map task names to method names (replace hyphens with underscores)
-        method_name = task.replace("-", "_")
-
-        # Check if the method exists on this agent
-        if not hasattr(self, method_name):
-            return {"error": f"Unknown task: {task}"}
-
-        try:
-            # Get the method and extract its parameters (excluding 'self')
-            method = getattr(self, method_name)
-
-            # Call the method with the message parameters (excluding 'task')
-            method_params = {k: v for k, v in message.items() if k != "task"}
-            result = method(**method_params)
-
-            # Handle both Pydantic models and dictionaries
-            if hasattr(result, 'model_dump'):
-                return result.model_dump()
-            else:
-                return result
 
-        except TypeError as e:
-            return {"error": f"Invalid parameters for task {task}: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error executing task {task}: {str(e)}"}
+# Behavioural contract enforced on both suggest_workflow_improvements and its async variant
+_SUGGEST_WORKFLOW_IMPROVEMENTS_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Suggest improvements to the GitHub Actions workflow to prevent similar issues",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "moderate", "verbosity": "comprehensive"},
+    "response_contract": {"output_format": {"required_fields": ["workflow_improvements", "prevention_strategies", "monitoring_recommendations"]}}
+}
 
 
+@task_contract(**_SUGGEST_WORKFLOW_IMPROVEMENTS_CONTRACT)
+def suggest_workflow_improvements(error_analysis: Dict[str, Any], workflow_name: str, repository: str, recurring_patterns: List[Any], memory_summary: str = '') -> Suggest_Workflow_ImprovementsOutput:
+    """Process suggest_workflow_improvements task.
 
-    def setup_logging(self):
-        """Configure DACP logging from YAML configuration."""
-        logging_config = self.config.get('logging', {})
+    Args:
+        error_analysis: {'type': 'object', 'description': 'Previous analysis result'}
+        workflow_name: {'type': 'string', 'description': 'Name of the workflow'}
+        repository: {'type': 'string', 'description': 'Repository name'}
+        recurring_patterns: {'type': 'array', 'items': {'type': 'string'}, 'description': 'Patterns of recurring issues'}
+        memory_summary: Optional memory context for the task
 
-        if not logging_config.get('enabled', True):
-            return
+    Returns:
+        Suggest_Workflow_ImprovementsOutput
+    """
+    prompt = _build_suggest_workflow_improvements_prompt(error_analysis, workflow_name, repository, recurring_patterns, memory_summary=memory_summary)
 
-        # Process environment variable overrides
-        env_overrides = logging_config.get('env_overrides', {})
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    return _invoke_suggest_workflow_improvements(prompt, _INTELLIGENCE_CONFIG)
 
-        level = logging_config.get('level', 'INFO')
-        if 'level' in env_overrides:
-            level = os.getenv(env_overrides['level'], level)
 
-        format_style = logging_config.get('format_style', 'emoji')
-        if 'format_style' in env_overrides:
-            format_style = os.getenv(env_overrides['format_style'], format_style)
+@task_contract(**_SUGGEST_WORKFLOW_IMPROVEMENTS_CONTRACT)
+async def suggest_workflow_improvements_async(error_analysis: Dict[str, Any], workflow_name: str, repository: str, recurring_patterns: List[Any], memory_summary: str = '') -> Suggest_Workflow_ImprovementsOutput:
+    """Async variant of suggest_workflow_improvements that awaits the LLM call instead of blocking a thread."""
+    prompt = _build_suggest_workflow_improvements_prompt(error_analysis, workflow_name, repository, recurring_patterns, memory_summary=memory_summary)
+    return await _ainvoke_suggest_workflow_improvements(prompt, _INTELLIGENCE_CONFIG)
 
-        log_file = logging_config.get('log_file')
-        if 'log_file' in env_overrides:
-            log_file = os.getenv(env_overrides['log_file'], log_file)
 
-        # Create log directory if needed
-        if log_file:
-            from pathlib import Path
-            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+class GithubActionsErrorAnalyzerAgent(BaseDacpAgent):
+    _CONFIG_OVERRIDES = {
+        "logging": {
+            "log_file": "./logs/github-actions-analyzer.log",
+            "env_overrides": {
+                "log_file": "DACP_LOG_FILE_ANALYZER"
+            }
+        },
+        "intelligence": {
+            "model": "gpt-4",
+            "config": {
+                "temperature": 0.3,
+                "max_tokens": 2000
+            }
+        }
+    }
+    _TASKS = ("analyze_error", "generate_pr_comment", "suggest_workflow_improvements", "analyze_and_report")
 
-        # Configure DACP logging
-        dacp.setup_dacp_logging(
-            level=level,
-            format_style=format_style,
-            include_timestamp=logging_config.get('include_timestamp', True),
-            log_file=log_file
-        )
 
+    @property
+    def cache_stats(self) -> dict:
+        """Hit and miss counters of the shared LLM response cache."""
+        return {"hits": LLM_CACHE.hits, "misses": LLM_CACHE.misses}
 
 
     def analyze_error(self, error_summary, job_context, log_statistics, additional_context) -> Analyze_ErrorOutput:
@@ -627,6 +575,97 @@ class GithubActionsErrorAnalyzerAgent(dacp.Agent):
         return suggest_workflow_improvements(error_analysis, workflow_name, repository, recurring_patterns, memory_summary=memory_summary)
 
 
+    def analyze_and_report(self, error_summary, job_context, log_statistics, additional_context, recurring_patterns=None) -> dict:
+        """Run analyze_error, then generate_pr_comment and suggest_workflow_improvements concurrently.
+
+        Both follow-up tasks depend only on the analysis output, so their LLM
+        calls are issued in parallel instead of back to back. If analyze_error
+        returns the contract's fallback, only that result is returned and the
+        follow-up tasks are skipped.
+        """
+        analysis = as_dict(self.analyze_error(error_summary, job_context, log_statistics, additional_context))
+        if is_contract_fallback(analysis):
+            # Without an analysis there is nothing for the follow-up tasks to work from
+            return {"analyze_error": analysis}
+        job_context = job_context if isinstance(job_context, dict) else {}
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pr_comment = executor.submit(
+                self.generate_pr_comment,
+                analysis.get("analysis_result", {}),
+                analysis.get("recommended_fixes", []),
+                analysis.get("developer_message", {}),
+                job_context.get("pr_number"),
+                job_context.get("repository"),
+                job_context.get("job_name"),
+                job_context.get("workflow_name")
+            )
+            workflow_improvements = executor.submit(
+                self.suggest_workflow_improvements,
+                analysis,
+                job_context.get("workflow_name"),
+                job_context.get("repository"),
+                recurring_patterns or []
+            )
+
+            return {
+                "analyze_error": analysis,
+                "generate_pr_comment": as_dict(pr_comment.result()),
+                "suggest_workflow_improvements": as_dict(workflow_improvements.result())
+            }
+
+
+    async def analyze_error_async(self, error_summary, job_context, log_statistics, additional_context) -> Analyze_ErrorOutput:
+        """Process analyze_error task without blocking the event loop."""
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return await analyze_error_async(error_summary, job_context, log_statistics, additional_context, memory_summary=memory_summary)
+
+
+    async def generate_pr_comment_async(self, analysis_result, recommended_fixes, developer_message, pr_number, repository, job_name, workflow_name) -> Generate_Pr_CommentOutput:
+        """Process generate_pr_comment task without blocking the event loop."""
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return await generate_pr_comment_async(analysis_result, recommended_fixes, developer_message, pr_number, repository, job_name, workflow_name, memory_summary=memory_summary)
+
+
+    async def suggest_workflow_improvements_async(self, error_analysis, workflow_name, repository, recurring_patterns) -> Suggest_Workflow_ImprovementsOutput:
+        """Process suggest_workflow_improvements task without blocking the event loop."""
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return await suggest_workflow_improvements_async(error_analysis, workflow_name, repository, recurring_patterns, memory_summary=memory_summary)
+
+
+    async def analyze_and_report_async(self, error_summary, job_context, log_statistics, additional_context, recurring_patterns=None) -> dict:
+        """Async analyze_and_report: the two follow-up tasks are gathered on the event loop."""
+        analysis = as_dict(await self.analyze_error_async(error_summary, job_context, log_statistics, additional_context))
+        if is_contract_fallback(analysis):
+            # Without an analysis there is nothing for the follow-up tasks to work from
+            return {"analyze_error": analysis}
+        job_context = job_context if isinstance(job_context, dict) else {}
+
+        pr_comment, workflow_improvements = await asyncio.gather(
+            self.generate_pr_comment_async(
+                analysis.get("analysis_result", {}),
+                analysis.get("recommended_fixes", []),
+                analysis.get("developer_message", {}),
+                job_context.get("pr_number"),
+                job_context.get("repository"),
+                job_context.get("job_name"),
+                job_context.get("workflow_name")
+            ),
+            self.suggest_workflow_improvements_async(
+                analysis,
+                job_context.get("workflow_name"),
+                job_context.get("repository"),
+                recurring_patterns or []
+            )
+        )
+
+        return {
+            "analyze_error": analysis,
+            "generate_pr_comment": as_dict(pr_comment),
+            "suggest_workflow_improvements": as_dict(workflow_improvements)
+        }
+
+
 
 def main():
     # Example usage - in production, you would get these from your orchestrator setup
@@ -639,9 +678,9 @@ def main():
     result = agent.analyze_error(error_summary="example_error_summary", job_context="example_job_context", log_statistics="example_log_statistics", additional_context="example_additional_context")
     # Handle both Pydantic models and dictionaries
     if hasattr(result, 'model_dump'):
-        print(json.dumps(result.model_dump(), indent=2))
+        print(json_dumps_pretty(result.model_dump()))
     else:
-        print(json.dumps(result, indent=2))
+        print(json_dumps_pretty(result))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,23 +1,49 @@
-import os
+import re
+import sys
 import logging
-import json
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Any, Dict, List
-from jinja2 import Environment, FileSystemLoader
-from pydantic import BaseModel
-from behavioural_contracts import behavioural_contract
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 from dotenv import load_dotenv
 
-import dacp
-from dacp import parse_with_fallback, invoke_intelligence
 from dacp.orchestrator import Orchestrator
 
 load_dotenv()
 
 log = logging.getLogger(__name__)
 
+# Resolved once at import; prompt templates are looked up relative to this module
+_MODULE_DIR = Path(__file__).resolve().parent
+_PROMPTS_DIR = _MODULE_DIR / "prompts"
+
+# Code shared by the agents lives in agents/dacp_agent_common.py. Agents are
+# loaded by file path, so the agents directory is put on sys.path to import it.
+if str(_MODULE_DIR.parent) not in sys.path:
+    sys.path.append(str(_MODULE_DIR.parent))
+
+from dacp_agent_common import (  # noqa: E402
+    BaseDacpAgent,
+    ainvoke_intelligence,
+    invoke_intelligence_pooled,
+    is_contract_fallback,
+    json_dumps_pretty,
+    llm_cached,
+    llm_fell_back,
+    load_prompt_template,
+    parse_llm_output,
+    render_prompt,
+    task_contract,
+)
+
 ROLE = "Github_Actions_Error_Collector"
 
+# Output models are immutable and ignore unknown keys, so validation never
+# has to track extras and instances can be shared safely
+_OUTPUT_MODEL_CONFIG = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
 # Generate output models
 class Collect_ErrorsOutputError_Summary(BaseModel):
     """The main error message extracted from logs"""
@@ -32,6 +58,7 @@ class Collect_ErrorsOutputError_Summary(BaseModel):
     error_context: Optional[str] = None
     """Keywords for further analysis"""
     suggested_keywords: Optional[List[str]] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Collect_ErrorsOutputJob_Context(BaseModel):
     job_name: str
     workflow_name: str
@@ -40,22 +67,26 @@ class Collect_ErrorsOutputJob_Context(BaseModel):
     commit_sha: Optional[str] = None
     pr_number: Optional[int] = None
     failed_step: Optional[str] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Collect_ErrorsOutputLog_Statistics(BaseModel):
     total_lines: int
     error_lines: int
     warning_lines: int
     """Estimated job duration before failure"""
     duration_estimate: Optional[str] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Collect_ErrorsOutput(BaseModel):
     error_summary: Collect_ErrorsOutputError_Summary
     job_context: Collect_ErrorsOutputJob_Context
     log_statistics: Collect_ErrorsOutputLog_Statistics
+    model_config = _OUTPUT_MODEL_CONFIG
 
 class Extract_Build_InfoOutputEnvironment_Info(BaseModel):
     os: Optional[str] = None
     node_version: Optional[str] = None
     python_version: Optional[str] = None
     java_version: Optional[str] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 class Extract_Build_InfoOutput(BaseModel):
     """Build commands that were executed"""
     build_commands: List[str]
@@ -65,105 +96,136 @@ class Extract_Build_InfoOutput(BaseModel):
     build_artifacts: Optional[List[str]] = None
     """Environment information extracted from logs"""
     environment_info: Optional[Extract_Build_InfoOutputEnvironment_Info] = None
+    model_config = _OUTPUT_MODEL_CONFIG
 
 
-# Task functions
 
-def parse_collect_errors_output(response) -> Collect_ErrorsOutput:
-    """Parse LLM response into Collect_ErrorsOutput using DACP's enhanced parser.
+# Volatile parts of CI logs that differ between reruns of the same failure
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}\S*")
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_HEX_RE = re.compile(r"\b[0-9a-f]{7,40}\b")
+_LINE_NUMBER_RE = re.compile(r"(:|\bline )\d+\b")
+_ABS_PATH_RE = re.compile(r"(?:(?<![\w.])/|\b[A-Za-z]:\\)(?:[\w.-]+[/\\])+")
 
-    Args:
-        response: Raw response from the LLM (str or dict)
 
-    Returns:
-        Parsed and validated Collect_ErrorsOutput instance
+def _normalize_log(raw_logs: str) -> str:
+    """Reduce a log to its template by masking timestamps, colors, hashes, line numbers and directories.
 
-    Raises:
-        ValueError: If the response cannot be parsed
+    Reruns of the same failure normalize to the same string, so the template can
+    be used to recognise a failure that has already been analyzed.
     """
-    if isinstance(response, Collect_ErrorsOutput):
-        return response
+    log_template = _ANSI_RE.sub("", raw_logs)
+    log_template = _TIMESTAMP_RE.sub("<TS>", log_template)
+    log_template = _ABS_PATH_RE.sub("<PATH>/", log_template)
+    log_template = _HEX_RE.sub("<HEX>", log_template)
+    return _LINE_NUMBER_RE.sub(r"\1<N>", log_template)
 
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "error_summary": {
-                "primary_error": "default_primary_error",
-                "error_type": "default_error_type",
-                "severity": "default_severity",
-                "affected_files": [],
-                "stack_trace": "default_stack_trace",
-                "error_context": "default_error_context",
-                "suggested_keywords": []
-            },
-            "job_context": {
-                "job_name": "default_job_name",
-                "workflow_name": "default_workflow_name",
-                "repository": "default_repository",
-                "branch": "default_branch",
-                "commit_sha": "default_commit_sha",
-                "pr_number": 0,
-                "failed_step": "default_failed_step"
-            },
-            "log_statistics": {
-                "total_lines": 0,
-                "error_lines": 0,
-                "warning_lines": 0,
-                "duration_estimate": "default_duration_estimate"
-            }
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Collect_ErrorsOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
 
+# Lines that mark an error or a warning in CI output
+_ERROR_LINE_RE = re.compile(r"(?:error|exception)s?\b|\b(?:traceback|failed|failure|fatal)\b|\berr!", re.IGNORECASE)
+_WARNING_LINE_RE = re.compile(r"\bwarn(?:ing)?\b", re.IGNORECASE)
+_ERROR_KEYWORDS = ("err", "exception", "traceback", "fail", "fatal")
+_LOG_CONTEXT_LINES = 5
 
-@behavioural_contract(
-    version="0.1.2",
-    description="Extract and summarize errors from GitHub Actions logs",
-    role="analyst",
-    behavioural_flags={"conservatism": "high", "verbosity": "detailed"},
-    response_contract={"output_format": {"required_fields": ["error_summary", "job_context", "log_statistics"]}}
-)
-def collect_errors(job_name: str, workflow_name: str, raw_logs: str, job_step: str, repository: str, branch: str, commit_sha: str, pr_number: int, memory_summary: str = '') -> Collect_ErrorsOutput:
-    """Process collect_errors task.
 
-    Args:
-        job_name: {'type': 'string', 'description': 'Name of the GitHub Actions job that failed', 'minLength': 1, 'maxLength': 200}
-        workflow_name: {'type': 'string', 'description': 'Name of the GitHub Actions workflow', 'minLength': 1, 'maxLength': 200}
-        raw_logs: {'type': 'string', 'description': 'Raw log output from the failed GitHub Actions job', 'minLength': 10, 'maxLength': 50000}
-        job_step: {'type': 'string', 'description': 'Specific step in the job where the error occurred', 'maxLength': 500}
-        repository: {'type': 'string', 'description': 'Repository where the workflow is running', 'pattern': '^[a-zA-Z0-9._-]+/[a-zA-Z0-9._-]+$'}
-        branch: {'type': 'string', 'description': 'Branch where the workflow was triggered', 'maxLength': 100}
-        commit_sha: {'type': 'string', 'description': 'Commit SHA that triggered the workflow', 'pattern': '^[a-fA-F0-9]{40}$|^[a-fA-F0-9]{64}$'}
-        pr_number: {'type': 'integer', 'description': 'Pull request number if applicable', 'minimum': 1}
-        memory_summary: Optional memory context for the task
+def _prefilter_log(raw_logs: str):
+    """Trim a log to the windows around its error lines and count its lines.
 
-    Returns:
-        Collect_ErrorsOutput
+    Returns the trimmed log together with total, error and warning line counts
+    of the full log. Logs without any error line are returned unchanged.
     """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
+    lines = raw_logs.splitlines()
+    # Cheap substring scan before running the regexes line by line
+    lowered = raw_logs.lower()
+    has_errors = any(keyword in lowered for keyword in _ERROR_KEYWORDS)
+    has_warnings = "warn" in lowered
+
+    error_indexes = [i for i, line in enumerate(lines) if _ERROR_LINE_RE.search(line)] if has_errors else []
+    warning_lines = sum(1 for line in lines if _WARNING_LINE_RE.search(line)) if has_warnings else 0
+    stats = {"total_lines": len(lines), "error_lines": len(error_indexes), "warning_lines": warning_lines}
+
+    # Merge the context windows around each error line into line ranges
+    windows = []
+    for i in error_indexes:
+        start, end = max(i - _LOG_CONTEXT_LINES, 0), min(i + _LOG_CONTEXT_LINES + 1, len(lines))
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+
+    if not windows or sum(end - start for start, end in windows) == len(lines):
+        return raw_logs, stats
+
+    parts = []
+    position = 0
+    for start, end in windows:
+        if start > position:
+            parts.append(f"[... {start - position} lines omitted ...]")
+        parts.extend(lines[start:end])
+        position = end
+    if position < len(lines):
+        parts.append(f"[... {len(lines) - position} lines omitted ...]")
+    return "\n".join(parts), stats
+
+
+def _log_template_key(task: str, raw_logs: str, *extra: str) -> bytes:
+    """Hash the task name, extra discriminators and the normalized log into a template cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in (task, *extra, _normalize_log(raw_logs)):
+        data = field.encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.digest()
+
+
+# Default outputs used when a response cannot be validated. They are validated
+# once at import like any response, so a schema change that the defaults no
+# longer satisfy fails on import rather than on the first fallback.
+_COLLECT_ERRORS_DEFAULT = Collect_ErrorsOutput.model_validate({
+    "error_summary": {
+        "primary_error": "default_primary_error",
+        "error_type": "default_error_type",
+        "severity": "default_severity",
+        "affected_files": [],
+        "stack_trace": "default_stack_trace",
+        "error_context": "default_error_context",
+        "suggested_keywords": []
+    },
+    "job_context": {
+        "job_name": "default_job_name",
+        "workflow_name": "default_workflow_name",
+        "repository": "default_repository",
+        "branch": "default_branch",
+        "commit_sha": "default_commit_sha",
+        "pr_number": 0,
+        "failed_step": "default_failed_step"
+    },
+    "log_statistics": {
+        "total_lines": 0,
+        "error_lines": 0,
+        "warning_lines": 0,
+        "duration_estimate": "default_duration_estimate"
     }
+})
+_EXTRACT_BUILD_INFO_DEFAULT = Extract_Build_InfoOutput.model_validate({
+    "build_commands": [],
+    "dependencies": []
+})
+
+# Validators compiled once and reused by every parse_*_output call
+_COLLECT_ERRORS_ADAPTER = TypeAdapter(Collect_ErrorsOutput)
+_EXTRACT_BUILD_INFO_ADAPTER = TypeAdapter(Extract_Build_InfoOutput)
+
+# Intelligence configuration shared by every call
+_INTELLIGENCE_CONFIG = {
+    "engine": "openai",
+    "model": "gpt-3.5-turbo",
+    "endpoint": "https://api.openai.com/v1",
+    "temperature": 0.2,
+    "max_tokens": 1500
+}
 
-    # Define output format description
-    output_format = """
+_COLLECT_ERRORS_OUTPUT_FORMAT = """
 - error_summary (required): object
   - primary_error (required): string
     The main error message extracted from logs
@@ -193,95 +255,178 @@ def collect_errors(job_name: str, workflow_name: str, raw_logs: str, job_step: s
     Estimated job duration before failure
 """
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"collect_errors.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
+_EXTRACT_BUILD_INFO_OUTPUT_FORMAT = """
+- build_commands (required): array of strings
+  Build commands that were executed
+- dependencies (required): array of strings
+  Dependencies mentioned in the build
+- build_artifacts (optional): array of strings
+  Build artifacts that were expected
+- environment_info (optional): object
+  Environment information extracted from logs
+  - os (optional): string
+  - node_version (optional): string
+  - python_version (optional): string
+  - java_version (optional): string
+"""
+
+
+# Task functions
+
+def parse_collect_errors_output(response) -> Collect_ErrorsOutput:
+    """Parse LLM response into Collect_ErrorsOutput using DACP's enhanced parser.
+
+    Args:
+        response: Raw response from the LLM (str, bytes or dict)
+
+    Returns:
+        Parsed and validated Collect_ErrorsOutput instance, or the default output
+        if a text response holds no valid JSON
+
+    Raises:
+        ValueError: If a dict response does not validate or the response has another type
+    """
+    return parse_llm_output(response, _COLLECT_ERRORS_ADAPTER, _COLLECT_ERRORS_DEFAULT)[0]
+
+
+@llm_cached(_COLLECT_ERRORS_ADAPTER, _COLLECT_ERRORS_DEFAULT)
+def _invoke_collect_errors(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
+
+
+@llm_cached(_COLLECT_ERRORS_ADAPTER, _COLLECT_ERRORS_DEFAULT)
+async def _ainvoke_collect_errors(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
+
+
+def _build_collect_errors_prompt(job_name: str, workflow_name: str, raw_logs: str, job_step: str, repository: str, branch: str, commit_sha: str, pr_number: int, memory_summary: str = ''):
+    """Render the collect_errors prompt shared by the sync and async entry points.
+
+    Returns the prompt and the line counts of the full log.
+    """
+    # Send only the error windows of the log; the line counts are computed here
+    # from the full log rather than estimated by the LLM
+    raw_logs, log_statistics = _prefilter_log(raw_logs)
 
     # Create input dictionary for template
     input_dict = {
         "job_name": job_name, "workflow_name": workflow_name, "raw_logs": raw_logs, "job_step": job_step, "repository": repository, "branch": branch, "commit_sha": commit_sha, "pr_number": pr_number
     }
 
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
+    # Render the prompt with all necessary context
+    prompt = render_prompt(
+        load_prompt_template(_PROMPTS_DIR, "collect_errors.jinja2"),
+        input_dict,
+        _COLLECT_ERRORS_OUTPUT_FORMAT,
+        memory_summary=memory_summary,
+        log_statistics=log_statistics
     )
+    return prompt, log_statistics
 
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-3.5-turbo",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.2,
-    "max_tokens": 1500
+
+def _with_log_statistics(result: Collect_ErrorsOutput, log_statistics: Dict[str, int]) -> Collect_ErrorsOutput:
+    """Replace the LLM's line counts with the ones counted from the log."""
+    return result.model_copy(update={
+        "log_statistics": result.log_statistics.model_copy(update=log_statistics)
+    })
+
+
+# Behavioural contract enforced on both collect_errors and its async variant
+_COLLECT_ERRORS_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Extract and summarize errors from GitHub Actions logs",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "high", "verbosity": "detailed"},
+    "response_contract": {"output_format": {"required_fields": ["error_summary", "job_context", "log_statistics"]}}
 }
 
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_collect_errors_output(result)
+
+@task_contract(**_COLLECT_ERRORS_CONTRACT)
+def collect_errors(job_name: str, workflow_name: str, raw_logs: str, job_step: str, repository: str, branch: str, commit_sha: str, pr_number: int, memory_summary: str = '') -> Collect_ErrorsOutput:
+    """Process collect_errors task.
+
+    Args:
+        job_name: {'type': 'string', 'description': 'Name of the GitHub Actions job that failed', 'minLength': 1, 'maxLength': 200}
+        workflow_name: {'type': 'string', 'description': 'Name of the GitHub Actions workflow', 'minLength': 1, 'maxLength': 200}
+        raw_logs: {'type': 'string', 'description': 'Raw log output from the failed GitHub Actions job', 'minLength': 10, 'maxLength': 50000}
+        job_step: {'type': 'string', 'description': 'Specific step in the job where the error occurred', 'maxLength': 500}
+        repository: {'type': 'string', 'description': 'Repository where the workflow is running', 'pattern': '^[a-zA-Z0-9._-]+/[a-zA-Z0-9._-]+$'}
+        branch: {'type': 'string', 'description': 'Branch where the workflow was triggered', 'maxLength': 100}
+        commit_sha: {'type': 'string', 'description': 'Commit SHA that triggered the workflow', 'pattern': '^[a-fA-F0-9]{40}$|^[a-fA-F0-9]{64}$'}
+        pr_number: {'type': 'integer', 'description': 'Pull request number if applicable', 'minimum': 1}
+        memory_summary: Optional memory context for the task
+
+    Returns:
+        Collect_ErrorsOutput
+    """
+    prompt, log_statistics = _build_collect_errors_prompt(job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number, memory_summary=memory_summary)
+
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    result = _invoke_collect_errors(prompt, _INTELLIGENCE_CONFIG)
+    return _with_log_statistics(result, log_statistics)
+
+
+@task_contract(**_COLLECT_ERRORS_CONTRACT)
+async def collect_errors_async(job_name: str, workflow_name: str, raw_logs: str, job_step: str, repository: str, branch: str, commit_sha: str, pr_number: int, memory_summary: str = '') -> Collect_ErrorsOutput:
+    """Async variant of collect_errors that awaits the LLM call instead of blocking a thread."""
+    prompt, log_statistics = _build_collect_errors_prompt(job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number, memory_summary=memory_summary)
+    result = await _ainvoke_collect_errors(prompt, _INTELLIGENCE_CONFIG)
+    return _with_log_statistics(result, log_statistics)
 
 
 def parse_extract_build_info_output(response) -> Extract_Build_InfoOutput:
     """Parse LLM response into Extract_Build_InfoOutput using DACP's enhanced parser.
 
     Args:
-        response: Raw response from the LLM (str or dict)
+        response: Raw response from the LLM (str, bytes or dict)
 
     Returns:
-        Parsed and validated Extract_Build_InfoOutput instance
+        Parsed and validated Extract_Build_InfoOutput instance, or the default output
+        if a text response holds no valid JSON
 
     Raises:
-        ValueError: If the response cannot be parsed
+        ValueError: If a dict response does not validate or the response has another type
     """
-    if isinstance(response, Extract_Build_InfoOutput):
-        return response
+    return parse_llm_output(response, _EXTRACT_BUILD_INFO_ADAPTER, _EXTRACT_BUILD_INFO_DEFAULT)[0]
 
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "build_commands": [],
-            "dependencies": [],
-            "build_artifacts": [],
-            "environment_info": {
-                "os": "default_os",
-                "node_version": "default_node_version",
-                "python_version": "default_python_version",
-                "java_version": "default_java_version"
-            }
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Extract_Build_InfoOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
 
+@llm_cached(_EXTRACT_BUILD_INFO_ADAPTER, _EXTRACT_BUILD_INFO_DEFAULT)
+def _invoke_extract_build_info(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
 
-@behavioural_contract(
-    version="0.1.2",
-    description="Extract build-specific information from logs",
-    role="analyst",
-    behavioural_flags={"conservatism": "high", "verbosity": "detailed"},
-    response_contract={"output_format": {"required_fields": ["build_commands", "dependencies"]}}
-)
+
+@llm_cached(_EXTRACT_BUILD_INFO_ADAPTER, _EXTRACT_BUILD_INFO_DEFAULT)
+async def _ainvoke_extract_build_info(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
+
+
+def _build_extract_build_info_prompt(raw_logs: str, build_system: str, memory_summary: str = '') -> str:
+    """Render the extract_build_info prompt shared by the sync and async entry points."""
+    # Create input dictionary for template
+    input_dict = {
+        "raw_logs": raw_logs, "build_system": build_system
+    }
+
+    # Render the prompt with all necessary context
+    return render_prompt(
+        load_prompt_template(_PROMPTS_DIR, "extract_build_info.jinja2"),
+        input_dict,
+        _EXTRACT_BUILD_INFO_OUTPUT_FORMAT,
+        memory_summary=memory_summary
+    )
+
+
+# Behavioural contract enforced on both extract_build_info and its async variant
+_EXTRACT_BUILD_INFO_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Extract build-specific information from logs",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "high", "verbosity": "detailed"},
+    "response_contract": {"output_format": {"required_fields": ["build_commands", "dependencies"]}}
+}
+
+
+@task_contract(**_EXTRACT_BUILD_INFO_CONTRACT)
 def extract_build_info(raw_logs: str, build_system: str, memory_summary: str = '') -> Extract_Build_InfoOutput:
     """Process extract_build_info task.
 
@@ -293,190 +438,154 @@ def extract_build_info(raw_logs: str, build_system: str, memory_summary: str = '
     Returns:
         Extract_Build_InfoOutput
     """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
-    }
-
-    # Define output format description
-    output_format = """
-- build_commands (required): array of strings
-  Build commands that were executed
-- dependencies (required): array of strings
-  Dependencies mentioned in the build
-- build_artifacts (optional): array of strings
-  Build artifacts that were expected
-- environment_info (optional): object
-  Environment information extracted from logs
-  - os (optional): string
-  - node_version (optional): string
-  - python_version (optional): string
-  - java_version (optional): string
-"""
+    prompt = _build_extract_build_info_prompt(raw_logs, build_system, memory_summary=memory_summary)
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"extract_build_info.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    return _invoke_extract_build_info(prompt, _INTELLIGENCE_CONFIG)
 
-    # Create input dictionary for template
-    input_dict = {
-        "raw_logs": raw_logs, "build_system": build_system
-    }
-
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
-    )
 
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-3.5-turbo",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.2,
-    "max_tokens": 1500
-}
+@task_contract(**_EXTRACT_BUILD_INFO_CONTRACT)
+async def extract_build_info_async(raw_logs: str, build_system: str, memory_summary: str = '') -> Extract_Build_InfoOutput:
+    """Async variant of extract_build_info that awaits the LLM call instead of blocking a thread."""
+    prompt = _build_extract_build_info_prompt(raw_logs, build_system, memory_summary=memory_summary)
+    return await _ainvoke_extract_build_info(prompt, _INTELLIGENCE_CONFIG)
 
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_extract_build_info_output(result)
 
 
 
-class GithubActionsErrorCollectorAgent(dacp.Agent):
-    def __init__(self, agent_id: str, orchestrator: Orchestrator):
-        super().__init__()
-        self.agent_id = agent_id
-        orchestrator.register_agent(agent_id, self)
-        self.model = "gpt-3.5-turbo"
-
-        # Embed YAML config as dict during generation
-        self.config = {
-            "logging": {
-                "enabled": True,
-                "level": "INFO",
-                "format_style": "emoji",
-                "include_timestamp": True,
-                "log_file": "./logs/github-actions-collector.log",
-                "env_overrides": {
-                    "level": "DACP_LOG_LEVEL",
-                    "format_style": "DACP_LOG_STYLE",
-                    "log_file": "DACP_LOG_FILE_COLLECTOR"
-                }
-            },
-            "intelligence": {
-                "engine": "openai",
-                "model": "gpt-3.5-turbo",
-                "endpoint": "https://api.openai.com/v1",
-                "config": {
-                    "temperature": 0.2,
-                    "max_tokens": 1500
-                }
+class GithubActionsErrorCollectorAgent(BaseDacpAgent):
+    _CONFIG_OVERRIDES = {
+        "logging": {
+            "log_file": "./logs/github-actions-collector.log",
+            "env_overrides": {
+                "log_file": "DACP_LOG_FILE_COLLECTOR"
+            }
+        },
+        "intelligence": {
+            "model": "gpt-3.5-turbo",
+            "config": {
+                "temperature": 0.2,
+                "max_tokens": 1500
             }
         }
+    }
+    _TASKS = ("collect_errors", "extract_build_info")
 
-        # Setup DACP logging FIRST
-        self.setup_logging()
-
-
-    def handle_message(self, message: dict) -> dict:
-        """
-        Handles incoming messages from the orchestrator.
-        Processes messages based on the task specified and routes to appropriate agent methods.
-        """
-        task = message.get("task")
-        if not task:
-            return {"error": "Missing required field: task"}
 
-        # Map task names to method names (replace hyphens with underscores)
-        method_name = task.replace("-", "_")
+    def __init__(self, agent_id: str, orchestrator: Orchestrator):
+        super().__init__(agent_id, orchestrator)
 
-        # Check if the method exists on this agent
-        if not hasattr(self, method_name):
-            return {"error": f"Unknown task: {task}"}
+        # Outputs of previously analyzed logs, keyed by their normalized template
+        self._template_cache = OrderedDict()
+        self._template_cache_lock = threading.Lock()
 
-        try:
-            # Get the method and extract its parameters (excluding 'self')
-            method = getattr(self, method_name)
 
-            # Call the method with the message parameters (excluding 'task')
-            method_params = {k: v for k, v in message.items() if k != "task"}
-            result = method(**method_params)
+    _TEMPLATE_CACHE_SIZE = 1024
 
-            # Handle both Pydantic models and dictionaries
-            if hasattr(result, 'model_dump'):
-                return result.model_dump()
-            else:
-                return result
+    def _template_cache_get(self, key: bytes):
+        with self._template_cache_lock:
+            result = self._template_cache.get(key)
+            if result is not None:
+                self._template_cache.move_to_end(key)
+            return result
 
-        except TypeError as e:
-            return {"error": f"Invalid parameters for task {task}: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error executing task {task}: {str(e)}"}
+    def _template_cache_set(self, key: bytes, result) -> None:
+        with self._template_cache_lock:
+            self._template_cache[key] = result
+            self._template_cache.move_to_end(key)
+            while len(self._template_cache) > self._TEMPLATE_CACHE_SIZE:
+                self._template_cache.popitem(last=False)
 
 
+    def _cached_collect_errors(self, key: bytes, job_name, workflow_name, job_step, repository, branch, commit_sha, pr_number):
+        """Return the cached output for this log template with job_context taken from this call, if any."""
+        cached = self._template_cache_get(key)
+        if cached is None:
+            return None
+        try:
+            job_context = Collect_ErrorsOutputJob_Context.model_validate({
+                "job_name": job_name,
+                "workflow_name": workflow_name,
+                "repository": repository,
+                "branch": branch,
+                "commit_sha": commit_sha,
+                "pr_number": pr_number,
+                "failed_step": job_step
+            })
+        except ValidationError:
+            # Arguments the output model rejects, e.g. a non-numeric pr_number,
+            # are not patched into a cached output; the task runs instead
+            return None
+        return cached.model_copy(update={"job_context": job_context})
+
+    def _remember_collect_errors(self, key: bytes, result):
+        # The contract's fallback dict for an output that broke it is passed
+        # through as is and never cached
+        if is_contract_fallback(result):
+            return result
+        result = Collect_ErrorsOutput.model_validate(result)
+        # Outputs filled in from the parser defaults are not reused
+        if not llm_fell_back():
+            self._template_cache_set(key, result)
+        return result
 
-    def setup_logging(self):
-        """Configure DACP logging from YAML configuration."""
-        logging_config = self.config.get('logging', {})
+    def _remember_extract_build_info(self, key: bytes, result):
+        if is_contract_fallback(result):
+            return result
+        result = Extract_Build_InfoOutput.model_validate(result)
+        # Default outputs, and outputs with neither commands nor dependencies,
+        # carry nothing worth reusing
+        if not llm_fell_back() and (result.build_commands or result.dependencies):
+            self._template_cache_set(key, result)
+        return result
 
-        if not logging_config.get('enabled', True):
-            return
 
-        # Process environment variable overrides
-        env_overrides = logging_config.get('env_overrides', {})
+    def collect_errors(self, job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number) -> Collect_ErrorsOutput:
+        """Process collect_errors task.
 
-        level = logging_config.get('level', 'INFO')
-        if 'level' in env_overrides:
-            level = os.getenv(env_overrides['level'], level)
+        Logs that normalize to an already analyzed template reuse the earlier
+        error summary, with job_context taken from this call.
+        """
+        key = _log_template_key("collect_errors", raw_logs)
+        cached = self._cached_collect_errors(key, job_name, workflow_name, job_step, repository, branch, commit_sha, pr_number)
+        if cached is not None:
+            return cached
 
-        format_style = logging_config.get('format_style', 'emoji')
-        if 'format_style' in env_overrides:
-            format_style = os.getenv(env_overrides['format_style'], format_style)
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return self._remember_collect_errors(key, collect_errors(job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number, memory_summary=memory_summary))
 
-        log_file = logging_config.get('log_file')
-        if 'log_file' in env_overrides:
-            log_file = os.getenv(env_overrides['log_file'], log_file)
 
-        # Create log directory if needed
-        if log_file:
-            from pathlib import Path
-            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    def extract_build_info(self, raw_logs, build_system) -> Extract_Build_InfoOutput:
+        """Process extract_build_info task, reusing the output for logs with an already seen template."""
+        key = _log_template_key("extract_build_info", raw_logs, str(build_system))
+        cached = self._template_cache_get(key)
+        if cached is not None:
+            return cached.model_copy()
 
-        # Configure DACP logging
-        dacp.setup_dacp_logging(
-            level=level,
-            format_style=format_style,
-            include_timestamp=logging_config.get('include_timestamp', True),
-            log_file=log_file
-        )
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return self._remember_extract_build_info(key, extract_build_info(raw_logs, build_system, memory_summary=memory_summary))
 
 
+    async def collect_errors_async(self, job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number) -> Collect_ErrorsOutput:
+        """Process collect_errors task without blocking the event loop."""
+        key = _log_template_key("collect_errors", raw_logs)
+        cached = self._cached_collect_errors(key, job_name, workflow_name, job_step, repository, branch, commit_sha, pr_number)
+        if cached is not None:
+            return cached
 
-    def collect_errors(self, job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number) -> Collect_ErrorsOutput:
-        """Process collect_errors task."""
         memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
-        return collect_errors(job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number, memory_summary=memory_summary)
+        return self._remember_collect_errors(key, await collect_errors_async(job_name, workflow_name, raw_logs, job_step, repository, branch, commit_sha, pr_number, memory_summary=memory_summary))
 
 
-    def extract_build_info(self, raw_logs, build_system) -> Extract_Build_InfoOutput:
-        """Process extract_build_info task."""
-        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
-        return extract_build_info(raw_logs, build_system, memory_summary=memory_summary)
+    async def extract_build_info_async(self, raw_logs, build_system) -> Extract_Build_InfoOutput:
+        """Process extract_build_info task without blocking the event loop."""
+        key = _log_template_key("extract_build_info", raw_logs, str(build_system))
+        cached = self._template_cache_get(key)
+        if cached is not None:
+            return cached.model_copy()
 
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return self._remember_extract_build_info(key, await extract_build_info_async(raw_logs, build_system, memory_summary=memory_summary))
 
 
 def main():
@@ -488,11 +597,11 @@ def main():
 
     # Example usage with collect_errors task: collect_errors
     result = agent.collect_errors(job_name="example_job_name", workflow_name="example_workflow_name", raw_logs="example_raw_logs", job_step="example_job_step", repository="example_repository", branch="example_branch", commit_sha="example_commit_sha", pr_number="example_pr_number")
-    # Handle both Pydantic models and dictionaries
-    if hasattr(result, 'model_dump'):
-        print(json.dumps(result.model_dump(), indent=2))
+    # Handle both Pydantic models and dictionaries; models serialize straight to JSON
+    if hasattr(result, 'model_dump_json'):
+        print(result.model_dump_json(indent=2))
     else:
-        print(json.dumps(result, indent=2))
+        print(json_dumps_pretty(result))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,23 +1,43 @@
-import os
+import sys
 import logging
-import json
 from pathlib import Path
-from typing import Optional, Any, Dict, List
-from jinja2 import Environment, FileSystemLoader
-from pydantic import BaseModel
-from behavioural_contracts import behavioural_contract
+from typing import Any, Dict, List
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from dotenv import load_dotenv
 
-import dacp
-from dacp import parse_with_fallback, invoke_intelligence
 from dacp.orchestrator import Orchestrator
 
 load_dotenv()
 
 log = logging.getLogger(__name__)
 
+# Resolved once at import; prompt templates are looked up relative to this module
+_MODULE_DIR = Path(__file__).resolve().parent
+_PROMPTS_DIR = _MODULE_DIR / "prompts"
+
+# Code shared by the agents lives in agents/dacp_agent_common.py. Agents are
+# loaded by file path, so the agents directory is put on sys.path to import it.
+if str(_MODULE_DIR.parent) not in sys.path:
+    sys.path.append(str(_MODULE_DIR.parent))
+
+from dacp_agent_common import (  # noqa: E402
+    BaseDacpAgent,
+    ainvoke_intelligence,
+    invoke_intelligence_pooled,
+    json_dumps_pretty,
+    llm_cached,
+    load_prompt_template,
+    parse_llm_output,
+    render_prompt,
+    task_contract,
+)
+
 ROLE = "Github_Actions_Error_Remediator"
 
+# Output models are immutable and ignore unknown keys, so validation never
+# has to track extras and instances can be shared safely
+_OUTPUT_MODEL_CONFIG = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
 # Generate output models
 class Propose_RemediationOutput(BaseModel):
     """Unified diff (patch) showing the proposed fix"""
@@ -26,81 +46,31 @@ class Propose_RemediationOutput(BaseModel):
     files_to_change: List[str]
     """Explanation of why this fix is proposed"""
     rationale: str
+    model_config = _OUTPUT_MODEL_CONFIG
 
 
-# Task functions
-
-def parse_propose_remediation_output(response) -> Propose_RemediationOutput:
-    """Parse LLM response into Propose_RemediationOutput using DACP's enhanced parser.
-
-    Args:
-        response: Raw response from the LLM (str or dict)
-
-    Returns:
-        Parsed and validated Propose_RemediationOutput instance
-
-    Raises:
-        ValueError: If the response cannot be parsed
-    """
-    if isinstance(response, Propose_RemediationOutput):
-        return response
-
-    # Parse JSON string if needed
-    if isinstance(response, str):
-        try:
-            response = json.loads(response)
-        except json.JSONDecodeError as e:
-            raise ValueError(f'Failed to parse JSON response: {e}')
-
-    # Use DACP's enhanced JSON parser with fallback support
-    try:
-        defaults = {
-            "proposed_diff": "unified_default",
-            "files_to_change": [],
-            "rationale": "explanation_default"
-        }
-        result = parse_with_fallback(
-            response=response,
-            model_class=Propose_RemediationOutput,
-            **defaults
-        )
-        return result
-    except Exception as e:
-        raise ValueError(f'Error parsing response with DACP parser: {e}')
-
-
-@behavioural_contract(
-    version="0.1.2",
-    description="Propose a code change (diff) to fix the error described in the analyzer output.",
-    role="executor",
-    behavioural_flags={"conservatism": "moderate", "verbosity": "concise"},
-    response_contract={"output_format": {"required_fields": ["proposed_diff", "files_to_change", "rationale"]}}
-)
-def propose_remediation(analysis_result: Dict[str, Any], raw_logs: str, repository: str, branch: str, commit_sha: str, memory_summary: str = '') -> Propose_RemediationOutput:
-    """Process propose_remediation task.
+# Default output used when a response cannot be validated. It is validated
+# once at import like any response, so a schema change that the default no
+# longer satisfies fails on import rather than on the first fallback.
+_PROPOSE_REMEDIATION_DEFAULT = Propose_RemediationOutput.model_validate({
+    "proposed_diff": "unified_default",
+    "files_to_change": [],
+    "rationale": "explanation_default"
+})
 
-    Args:
-        analysis_result: {'type': 'object', 'description': 'Output from the analyzer agent (root cause, recommended fix, etc.)'}
-        raw_logs: {'type': 'string', 'description': 'Raw logs from the failed workflow'}
-        repository: {'type': 'string', 'description': 'Repository name (e.g., owner/repo)'}
-        branch: {'type': 'string', 'description': 'Branch where the error occurred'}
-        commit_sha: {'type': 'string', 'description': 'Commit SHA of the failed run'}
-        memory_summary: Optional memory context for the task
+# Validators compiled once and reused by every parse_*_output call
+_PROPOSE_REMEDIATION_ADAPTER = TypeAdapter(Propose_RemediationOutput)
 
-    Returns:
-        Propose_RemediationOutput
-    """
-    # Define memory configuration
-    memory_config = {
-        "enabled": False,
-        "format": "string",
-        "usage": "prompt-append",
-        "required": False,
-        "description": ""
-    }
+# Intelligence configuration shared by every call
+_INTELLIGENCE_CONFIG = {
+    "engine": "openai",
+    "model": "gpt-4",
+    "endpoint": "https://api.openai.com/v1",
+    "temperature": 0.2,
+    "max_tokens": 2000
+}
 
-    # Define output format description
-    output_format = """
+_PROPOSE_REMEDIATION_OUTPUT_FORMAT = """
 - proposed_diff (required): string
   Unified diff (patch) showing the proposed fix
 - files_to_change (required): array of strings
@@ -109,152 +79,107 @@ def propose_remediation(analysis_result: Dict[str, Any], raw_logs: str, reposito
   Explanation of why this fix is proposed
 """
 
-    # Load and render the prompt template
-    prompts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
-    env = Environment(loader=FileSystemLoader([".", prompts_dir]))
-    try:
-        template = env.get_template(f"propose_remediation.jinja2")
-    except FileNotFoundError:
-        log.warning(f"Task-specific prompt template not found, using default template")
-        template = env.get_template("agent_prompt.jinja2")
 
-    # Create input dictionary for template
-    input_dict = {
-        "analysis_result": analysis_result, "raw_logs": raw_logs, "repository": repository, "branch": branch, "commit_sha": commit_sha
-    }
+# Task functions
 
-    # Render the prompt with all necessary context - pass variables directly for template access
-    prompt = template.render(
-        input=input_dict,
-        memory_summary=memory_summary if memory_config['enabled'] else '',
-        output_format=output_format,
-        memory_config=memory_config,
-        **input_dict  # Also pass variables directly for template access
-    )
+def parse_propose_remediation_output(response) -> Propose_RemediationOutput:
+    """Parse LLM response into Propose_RemediationOutput using DACP's enhanced parser.
 
-    # Configure intelligence for DACP
-    intelligence_config = {
-    "engine": "openai",
-    "model": "gpt-4",
-    "endpoint": "https://api.openai.com/v1",
-    "temperature": 0.2,
-    "max_tokens": 2000
-}
+    Args:
+        response: Raw response from the LLM (str, bytes or dict)
 
-    # Call the LLM using DACP
-    result = invoke_intelligence(prompt, intelligence_config)
-    return parse_propose_remediation_output(result)
-
-
-
-class GithubActionsErrorRemediatorAgent(dacp.Agent):
-    def __init__(self, agent_id: str, orchestrator: Orchestrator):
-        super().__init__()
-        self.agent_id = agent_id
-        orchestrator.register_agent(agent_id, self)
-        self.model = "gpt-4"
-
-        # Embed YAML config as dict during generation
-        self.config = {
-            "logging": {
-                "enabled": True,
-                "level": "INFO",
-                "format_style": "emoji",
-                "include_timestamp": True,
-                "log_file": "./logs/github-actions-remediator.log",
-                "env_overrides": {
-                    "level": "DACP_LOG_LEVEL",
-                    "format_style": "DACP_LOG_STYLE",
-                    "log_file": "DACP_LOG_FILE_REMEDIATOR"
-                }
-            },
-            "intelligence": {
-                "engine": "openai",
-                "model": "gpt-4",
-                "endpoint": "https://api.openai.com/v1",
-                "config": {
-                    "temperature": 0.2,
-                    "max_tokens": 2000
-                }
-            }
-        }
+    Returns:
+        Parsed and validated Propose_RemediationOutput instance, or the default output
+        if a text response holds no valid JSON
 
-        # Setup DACP logging FIRST
-        self.setup_logging()
+    Raises:
+        ValueError: If a dict response does not validate or the response has another type
+    """
+    return parse_llm_output(response, _PROPOSE_REMEDIATION_ADAPTER, _PROPOSE_REMEDIATION_DEFAULT)[0]
 
 
-    def handle_message(self, message: dict) -> dict:
-        """
-        Handles incoming messages from the orchestrator.
-        Processes messages based on the task specified and routes to appropriate agent methods.
-        """
-        task = message.get("task")
-        if not task:
-            return {"error": "Missing required field: task"}
+@llm_cached(_PROPOSE_REMEDIATION_ADAPTER, _PROPOSE_REMEDIATION_DEFAULT)
+def _invoke_propose_remediation(prompt: str, intelligence_config: Dict[str, Any]):
+    return invoke_intelligence_pooled(prompt, intelligence_config)
 
-        # Map task names to method names (replace hyphens with underscores)
-        method_name = task.replace("-", "_")
 
-        # Check if the method exists on this agent
-        if not hasattr(self, method_name):
-            return {"error": f"Unknown task: {task}"}
+@llm_cached(_PROPOSE_REMEDIATION_ADAPTER, _PROPOSE_REMEDIATION_DEFAULT)
+async def _ainvoke_propose_remediation(prompt: str, intelligence_config: Dict[str, Any]):
+    return await ainvoke_intelligence(prompt, intelligence_config)
 
-        try:
-            # Get the method and extract its parameters (excluding 'self')
-            method = getattr(self, method_name)
 
-            # Call the method with the message parameters (excluding 'task')
-            method_params = {k: v for k, v in message.items() if k != "task"}
-            result = method(**method_params)
+def _build_propose_remediation_prompt(analysis_result: Dict[str, Any], raw_logs: str, repository: str, branch: str, commit_sha: str, memory_summary: str = '') -> str:
+    """Render the propose_remediation prompt shared by the sync and async entry points."""
+    # Create input dictionary for template
+    input_dict = {
+        "analysis_result": analysis_result, "raw_logs": raw_logs, "repository": repository, "branch": branch, "commit_sha": commit_sha
+    }
 
-            # Handle both Pydantic models and dictionaries
-            if hasattr(result, 'model_dump'):
-                return result.model_dump()
-            else:
-                return result
+    # Render the prompt with all necessary context
+    return render_prompt(
+        load_prompt_template(_PROMPTS_DIR, "propose_remediation.jinja2"),
+        input_dict,
+        _PROPOSE_REMEDIATION_OUTPUT_FORMAT,
+        memory_summary=memory_summary
+    )
 
-        except TypeError as e:
-            return {"error": f"Invalid parameters for task {task}: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error executing task {task}: {str(e)}"}
 
+# Behavioural contract enforced on both propose_remediation and its async variant
+_PROPOSE_REMEDIATION_CONTRACT = {
+    "version": "0.1.2",
+    "description": "Propose a code change (diff) to fix the error described in the analyzer output.",
+    "role": "executor",
+    "behavioural_flags": {"conservatism": "moderate", "verbosity": "concise"},
+    "response_contract": {"output_format": {"required_fields": ["proposed_diff", "files_to_change", "rationale"]}}
+}
 
 
-    def setup_logging(self):
-        """Configure DACP logging from YAML configuration."""
-        logging_config = self.config.get('logging', {})
+@task_contract(**_PROPOSE_REMEDIATION_CONTRACT)
+def propose_remediation(analysis_result: Dict[str, Any], raw_logs: str, repository: str, branch: str, commit_sha: str, memory_summary: str = '') -> Propose_RemediationOutput:
+    """Process propose_remediation task.
 
-        if not logging_config.get('enabled', True):
-            return
+    Args:
+        analysis_result: {'type': 'object', 'description': 'Output from the analyzer agent (root cause, recommended fix, etc.)'}
+        raw_logs: {'type': 'string', 'description': 'Raw logs from the failed workflow'}
+        repository: {'type': 'string', 'description': 'Repository name (e.g., owner/repo)'}
+        branch: {'type': 'string', 'description': 'Branch where the error occurred'}
+        commit_sha: {'type': 'string', 'description': 'Commit SHA of the failed run'}
+        memory_summary: Optional memory context for the task
 
-        # Process environment variable overrides
-        env_overrides = logging_config.get('env_overrides', {})
+    Returns:
+        Propose_RemediationOutput
+    """
+    prompt = _build_propose_remediation_prompt(analysis_result, raw_logs, repository, branch, commit_sha, memory_summary=memory_summary)
 
-        level = logging_config.get('level', 'INFO')
-        if 'level' in env_overrides:
-            level = os.getenv(env_overrides['level'], level)
+    # Call the LLM using DACP, answering identical prompts from the response cache
+    return _invoke_propose_remediation(prompt, _INTELLIGENCE_CONFIG)
 
-        format_style = logging_config.get('format_style', 'emoji')
-        if 'format_style' in env_overrides:
-            format_style = os.getenv(env_overrides['format_style'], format_style)
 
-        log_file = logging_config.get('log_file')
-        if 'log_file' in env_overrides:
-            log_file = os.getenv(env_overrides['log_file'], log_file)
+@task_contract(**_PROPOSE_REMEDIATION_CONTRACT)
+async def propose_remediation_async(analysis_result: Dict[str, Any], raw_logs: str, repository: str, branch: str, commit_sha: str, memory_summary: str = '') -> Propose_RemediationOutput:
+    """Async variant of propose_remediation that awaits the LLM call instead of blocking a thread."""
+    prompt = _build_propose_remediation_prompt(analysis_result, raw_logs, repository, branch, commit_sha, memory_summary=memory_summary)
+    return await _ainvoke_propose_remediation(prompt, _INTELLIGENCE_CONFIG)
 
-        # Create log directory if needed
-        if log_file:
-            from pathlib import Path
-            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
 
-        # Configure DACP logging
-        dacp.setup_dacp_logging(
-            level=level,
-            format_style=format_style,
-            include_timestamp=logging_config.get('include_timestamp', True),
-            log_file=log_file
-        )
 
+class GithubActionsErrorRemediatorAgent(BaseDacpAgent):
+    _CONFIG_OVERRIDES = {
+        "logging": {
+            "log_file": "./logs/github-actions-remediator.log",
+            "env_overrides": {
+                "log_file": "DACP_LOG_FILE_REMEDIATOR"
+            }
+        },
+        "intelligence": {
+            "model": "gpt-4",
+            "config": {
+                "temperature": 0.2,
+                "max_tokens": 2000
+            }
+        }
+    }
+    _TASKS = ("propose_remediation",)
 
 
     def propose_remediation(self, analysis_result, raw_logs, repository, branch, commit_sha) -> Propose_RemediationOutput:
@@ -263,6 +188,12 @@ class GithubActionsErrorRemediatorAgent(dacp.Agent):
         return propose_remediation(analysis_result, raw_logs, repository, branch, commit_sha, memory_summary=memory_summary)
 
 
+    async def propose_remediation_async(self, analysis_result, raw_logs, repository, branch, commit_sha) -> Propose_RemediationOutput:
+        """Process propose_remediation task without blocking the event loop."""
+        memory_summary = self.get_memory() if hasattr(self, 'get_memory') else ""
+        return await propose_remediation_async(analysis_result, raw_logs, repository, branch, commit_sha, memory_summary=memory_summary)
+
+
 
 def main():
     # Example usage - in production, you would get these from your orchestrator setup
@@ -273,11 +204,11 @@ def main():
 
     # Example usage with propose_remediation task: propose_remediation
     result = agent.propose_remediation(analysis_result="example_analysis_result", raw_logs="example_raw_logs", repository="example_repository", branch="example_branch", commit_sha="example_commit_sha")
-    # Handle both Pydantic models and dictionaries
-    if hasattr(result, 'model_dump'):
-        print(json.dumps(result.model_dump(), indent=2))
+    # Handle both Pydantic models and dictionaries; models serialize straight to JSON
+    if hasattr(result, 'model_dump_json'):
+        print(result.model_dump_json(indent=2))
     else:
-        print(json.dumps(result, indent=2))
+        print(json_dumps_pretty(result))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
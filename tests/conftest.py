@@ -0,0 +1,72 @@
+"""Fixtures shared by the agent tests.
+
+The agents are loaded by file path, the way the dacp CLI loads them, and every
+LLM call is answered by a stub instead of going to the OpenAI API.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from dacp.orchestrator import Orchestrator
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+
+# dacp_agent_common is imported by the tests directly as well as by the agents
+if str(AGENTS_DIR) not in sys.path:
+    sys.path.insert(0, str(AGENTS_DIR))
+
+_AGENT_CLASSES = {
+    "analyzer": "GithubActionsErrorAnalyzerAgent",
+    "collector": "GithubActionsErrorCollectorAgent",
+    "remediator": "GithubActionsErrorRemediatorAgent",
+}
+_MODULES = {}
+
+
+def load_agent_module(name: str):
+    """Import agents/github-actions-error-<name>/agent.py once per test session."""
+    if name not in _MODULES:
+        spec = importlib.util.spec_from_file_location(
+            f"github_actions_error_{name}_agent", AGENTS_DIR / f"github-actions-error-{name}" / "agent.py"
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _MODULES[name] = module
+    return _MODULES[name]
+
+
+class StubLLM:
+    """Answers LLM calls with ``respond(prompt)`` and records every prompt it was sent."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.prompts = []
+
+    def __call__(self, prompt, intelligence_config):
+        self.prompts.append(prompt)
+        return self.respond(prompt)
+
+    async def acall(self, prompt, intelligence_config):
+        return self(prompt, intelligence_config)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Return a function that routes an agent module's sync and async LLM calls to a StubLLM."""
+    def install(module, respond):
+        stub = StubLLM(respond)
+        monkeypatch.setattr(module, "invoke_intelligence_pooled", stub)
+        monkeypatch.setattr(module, "ainvoke_intelligence", stub.acall)
+        return stub
+    return install
+
+
+@pytest.fixture
+def make_agent(monkeypatch, tmp_path):
+    """Return a function that builds an agent by name, logging under tmp_path."""
+    def make(name: str):
+        monkeypatch.setenv(f"DACP_LOG_FILE_{name.upper()}", str(tmp_path / f"{name}.log"))
+        module = load_agent_module(name)
+        return getattr(module, _AGENT_CLASSES[name])(f"test-{name}", Orchestrator())
+    return make
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import load_agent_module
+
+ANALYSIS = {
+    "analysis_result": {
+        "root_cause": "lockfile out of date",
+        "error_category": "dependency_problem",
+        "confidence_level": "high",
+        "impact_assessment": "blocks merges"
+    },
+    "recommended_fixes": [{
+        "fix_title": "Regenerate the lockfile",
+        "fix_description": "Run npm install and commit package-lock.json",
+        "fix_type": "immediate",
+        "estimated_effort": "low"
+    }],
+    "developer_message": {"summary": "Update the lockfile", "detailed_explanation": "npm ci refused to install", "next_steps": ["npm install"]},
+    "urgency_level": "high"
+}
+PR_COMMENT = {"pr_comment": "The lockfile is stale", "comment_metadata": {"comment_type": "fix_suggestion", "tags": ["npm"], "urgency": "high"}}
+IMPROVEMENTS = {"workflow_improvements": [], "prevention_strategies": ["pin npm"], "monitoring_recommendations": []}
+
+MESSAGE = {
+    "task": "analyze_and_report",
+    "error_summary": {"primary_error": "npm ERR! cipm can only install with an existing package-lock.json", "error_type": "dependency_error", "severity": "high"},
+    "job_context": {"job_name": "build", "workflow_name": "CI", "repository": "octo/app", "pr_number": 7},
+    "log_statistics": {"total_lines": 120, "error_lines": 3, "warning_lines": 1},
+    "additional_context": {},
+    "recurring_patterns": ["stale lockfile"]
+}
+
+
+def respond(prompt):
+    """Answer each analyzer task from the output format its prompt asks for."""
+    if '"pr_comment"' in prompt:
+        return json.dumps(PR_COMMENT)
+    if '"workflow_improvements"' in prompt:
+        return json.dumps(IMPROVEMENTS)
+    return json.dumps(ANALYSIS)
+
+
+@pytest.fixture
+def analyzer(make_agent):
+    return make_agent("analyzer")
+
+
+def _check_report(result, stub):
+    assert "error" not in result
+    assert result["analyze_error"]["analysis_result"]["root_cause"] == "lockfile out of date"
+    assert result["generate_pr_comment"]["pr_comment"] == "The lockfile is stale"
+    assert result["suggest_workflow_improvements"]["prevention_strategies"] == ["pin npm"]
+
+    assert len(stub.prompts) == 3
+    follow_ups = [p for p in stub.prompts if "lockfile out of date" in p]
+    assert len(follow_ups) == 2
+    assert any("pull request #7 in octo/app" in p for p in follow_ups)
+    assert any("stale lockfile" in p for p in follow_ups)
+
+
+def test_analyze_and_report(analyzer, stub_llm):
+    stub = stub_llm(load_agent_module("analyzer"), respond)
+    _check_report(analyzer.handle_message(MESSAGE), stub)
+
+
+def test_analyze_and_report_async(analyzer, stub_llm):
+    stub = stub_llm(load_agent_module("analyzer"), respond)
+    _check_report(asyncio.run(analyzer.handle_message_async(MESSAGE)), stub)
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_analyze_and_report_stops_after_contract_fallback(analyzer, stub_llm, monkeypatch, run_async):
+    module = load_agent_module("analyzer")
+    stub = stub_llm(module, respond)
+    fallback = {"response": "", "reasoning": "Response validation failed", "error": "Response validation failed"}
+
+    async def analyze_error_async(*args, **kwargs):
+        return fallback
+
+    monkeypatch.setattr(module, "analyze_error", lambda *args, **kwargs: fallback)
+    monkeypatch.setattr(module, "analyze_error_async", analyze_error_async)
+
+    if run_async:
+        result = asyncio.run(analyzer.handle_message_async(MESSAGE))
+    else:
+        result = analyzer.handle_message(MESSAGE)
+
+    assert result == {"analyze_error": fallback}
+    assert stub.prompts == []
+
+
+def _with_analysis(**updates):
+    return {**ANALYSIS, "analysis_result": {**ANALYSIS["analysis_result"], **updates}}
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("confidence_level", "High", "high"),
+    ("confidence_level", "very high", "very_high"),
+    ("error_category", "Dependency-Problem", "dependency_problem"),
+])
+def test_closed_set_normalizes_spelling(field, value, expected, caplog):
+    module = load_agent_module("analyzer")
+    output, fell_back = module.parse_llm_output(json.dumps(_with_analysis(**{field: value})), module._ANALYZE_ERROR_ADAPTER, module._ANALYZE_ERROR_DEFAULT)
+    assert not fell_back
+    assert getattr(output.analysis_result, field) == expected
+    assert "Coerced" not in caplog.text
+
+
+def test_closed_set_coerces_first_word_alias_with_warning(caplog):
+    module = load_agent_module("analyzer")
+    output, fell_back = module.parse_llm_output(json.dumps(_with_analysis(error_category="permissions")), module._ANALYZE_ERROR_ADAPTER, module._ANALYZE_ERROR_DEFAULT)
+    assert not fell_back
+    assert output.analysis_result.error_category == "permissions_issue"
+    assert "'permissions'" in caplog.text
+
+
+@pytest.mark.parametrize("value", ["urgent", "severe", "very high please", 3])
+def test_closed_set_rejects_unknown_values(value):
+    module = load_agent_module("analyzer")
+    response = json.dumps({**ANALYSIS, "urgency_level": value})
+    output, fell_back = module.parse_llm_output(response, module._ANALYZE_ERROR_ADAPTER, module._ANALYZE_ERROR_DEFAULT)
+    assert fell_back
+    assert output == module._ANALYZE_ERROR_DEFAULT
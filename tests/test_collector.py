@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import load_agent_module
+
+COLLECTED = {
+    "error_summary": {"primary_error": "ModuleNotFoundError: No module named 'yaml'", "error_type": "dependency_error", "severity": "high"},
+    "job_context": {"job_name": "test", "workflow_name": "CI", "repository": "octo/app"},
+    "log_statistics": {"total_lines": 0, "error_lines": 0, "warning_lines": 0}
+}
+
+
+def collect_message(raw_logs, **overrides):
+    return {
+        "task": "collect_errors",
+        "job_name": "test",
+        "workflow_name": "CI",
+        "raw_logs": raw_logs,
+        "job_step": "pytest",
+        "repository": "octo/app",
+        "branch": "main",
+        "commit_sha": "a" * 40,
+        "pr_number": 12,
+        **overrides
+    }
+
+
+def failing_log(timestamp):
+    return f"{timestamp} Run pytest\n{timestamp} ModuleNotFoundError: No module named 'yaml'\n{timestamp} Process completed with exit code 1"
+
+
+@pytest.fixture
+def collector(make_agent):
+    return make_agent("collector")
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_template_cache_reuses_output_for_rerun(collector, stub_llm, run_async):
+    stub = stub_llm(load_agent_module("collector"), lambda prompt: json.dumps(COLLECTED))
+
+    def handle(message):
+        return asyncio.run(collector.handle_message_async(message)) if run_async else collector.handle_message(message)
+
+    first = handle(collect_message(failing_log("2026-01-05T10:00:00Z")))
+    rerun = handle(collect_message(failing_log("2026-01-06T08:30:12Z"), branch="fix-deps", pr_number=13))
+
+    assert len(stub.prompts) == 1
+    assert rerun["error_summary"] == first["error_summary"]
+    # job_context always describes the current call
+    assert rerun["job_context"]["branch"] == "fix-deps"
+    assert rerun["job_context"]["pr_number"] == 13
+    assert rerun["log_statistics"]["total_lines"] == 3
+
+
+def test_template_cache_misses_for_different_log(collector, stub_llm):
+    stub = stub_llm(load_agent_module("collector"), lambda prompt: json.dumps(COLLECTED))
+    collector.handle_message(collect_message(failing_log("2026-01-05T10:00:00Z")))
+    collector.handle_message(collect_message("Run npm ci\nnpm ERR! missing package-lock.json"))
+    assert len(stub.prompts) == 2
+
+
+def test_template_cache_skips_default_outputs(collector, stub_llm):
+    stub = stub_llm(load_agent_module("collector"), lambda prompt: "I cannot help with that.")
+    message = collect_message(failing_log("2026-01-05T10:00:00Z"))
+    collector.handle_message(message)
+    collector.handle_message(message)
+    assert len(stub.prompts) == 2
+
+
+def test_template_cache_keeps_empty_primary_error(collector, stub_llm):
+    response = {**COLLECTED, "error_summary": {**COLLECTED["error_summary"], "primary_error": ""}}
+    stub = stub_llm(load_agent_module("collector"), lambda prompt: json.dumps(response))
+    message = collect_message(failing_log("2026-01-05T10:00:00Z"))
+    assert collector.handle_message(message)["error_summary"]["primary_error"] == ""
+    collector.handle_message(message)
+    assert len(stub.prompts) == 1
+
+
+def test_normalize_log_masks_volatile_parts():
+    module = load_agent_module("collector")
+    first = "\x1b[31m2026-01-05T10:00:00.123Z Error at /home/runner/work/app/src/main.py:42 in commit 3f2a9c1d\x1b[0m"
+    rerun = "2026-01-06 08:30:12 Error at /tmp/build/src/main.py:57 in commit 9b8e7d6c"
+    assert module._normalize_log(first) == module._normalize_log(rerun) == "<TS> Error at <PATH>/main.py:<N> in commit <HEX>"
+
+
+def test_normalize_log_keeps_distinct_failures_apart():
+    module = load_agent_module("collector")
+    assert module._normalize_log("npm ERR! missing script: test") != module._normalize_log("npm ERR! missing script: build")
+
+
+def test_prefilter_log_keeps_context_around_errors():
+    module = load_agent_module("collector")
+    lines = [f"step {i}" for i in range(40)]
+    lines[20] = "Error: tests failed"
+    lines[30] = "warning: deprecated option"
+    trimmed, stats = module._prefilter_log("\n".join(lines))
+
+    assert stats == {"total_lines": 40, "error_lines": 1, "warning_lines": 1}
+    assert trimmed.splitlines() == ["[... 15 lines omitted ...]", *lines[15:26], "[... 14 lines omitted ...]"]
+
+
+def test_prefilter_log_merges_overlapping_windows():
+    module = load_agent_module("collector")
+    lines = [f"step {i}" for i in range(30)]
+    lines[10] = "FAILED tests/test_app.py::test_one"
+    lines[14] = "FAILED tests/test_app.py::test_two"
+    trimmed, stats = module._prefilter_log("\n".join(lines))
+
+    assert stats["error_lines"] == 2
+    assert trimmed.splitlines() == ["[... 5 lines omitted ...]", *lines[5:20], "[... 10 lines omitted ...]"]
+
+
+@pytest.mark.parametrize("raw_logs", ["step 1\nstep 2\nall good", "step 1\nError: boom\nstep 3"])
+def test_prefilter_log_returns_logs_without_anything_to_trim_unchanged(raw_logs):
+    module = load_agent_module("collector")
+    trimmed, stats = module._prefilter_log(raw_logs)
+    assert trimmed == raw_logs
+    assert stats["total_lines"] == 3
@@ -0,0 +1,259 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import dacp_agent_common
+import pytest
+from behavioural_contracts import BehaviouralContractViolationError
+from dacp_agent_common import LLMCache, is_contract_fallback, llm_cached, llm_fell_back, parse_llm_output, task_contract
+from pydantic import BaseModel, TypeAdapter
+
+OPENAI_CONFIG = {"engine": "openai", "model": "gpt-4o-mini", "api_key": "sk-test"}
+CONFIG = {"engine": "openai", "model": "gpt-4o-mini", "temperature": 0.2}
+CONTRACT = {
+    "version": "0.1.2",
+    "description": "Answer a question",
+    "role": "analyst",
+    "behavioural_flags": {"conservatism": "high"},
+    "response_contract": {"output_format": {"required_fields": ["answer"]}}
+}
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+ADAPTER = TypeAdapter(Answer)
+DEFAULT = Answer(answer="default_answer")
+
+
+def parse(response):
+    return parse_llm_output(response, ADAPTER, DEFAULT)
+
+
+class Clock:
+    """Stands in for time.monotonic so cache expiry can be stepped through."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dacp_agent_common.time, "monotonic", clock)
+    return clock
+
+
+def test_cache_key_depends_on_prompt_and_config():
+    key = LLMCache.key("prompt", CONFIG)
+    assert isinstance(key, bytes) and len(key) == 32
+    assert key == LLMCache.key("prompt", dict(reversed(CONFIG.items())))
+    assert key != LLMCache.key("prompt ", CONFIG)
+    assert key != LLMCache.key("prompt", {**CONFIG, "temperature": 0.3})
+
+
+def test_cache_entries_expire_after_ttl(clock):
+    cache = LLMCache(ttl=60)
+    key = LLMCache.key("prompt", CONFIG)
+    cache.set(key, '{"answer": "42"}', Answer(answer="42"))
+
+    clock.now += 59
+    assert cache.get(key, parse) == Answer(answer="42")
+    clock.now += 1
+    assert cache.get(key, parse) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = LLMCache(ttl=60, maxsize=2)
+    keys = [LLMCache.key(f"prompt {i}", CONFIG) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.set(key, "{}", Answer(answer=str(i)))
+    cache.get(keys[0], parse)
+    cache.set(keys[2], "{}", Answer(answer="2"))
+
+    assert cache.get(keys[1], parse) is None
+    assert cache.get(keys[0], parse) == Answer(answer="0")
+
+
+def test_cache_round_trips_through_disk(tmp_path, clock):
+    key = LLMCache.key("prompt", CONFIG)
+    LLMCache(ttl=60, cache_dir=tmp_path).set(key, '{"answer": "42"}', Answer(answer="42"))
+    assert (tmp_path / f"{key.hex()}.json").exists()
+
+    # A new process only has the entry on disk
+    assert LLMCache(ttl=60, cache_dir=tmp_path).get(key, parse) == Answer(answer="42")
+
+
+def test_cache_drops_expired_disk_entries(tmp_path):
+    key = LLMCache.key("prompt", CONFIG)
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=61)
+    (tmp_path / f"{key.hex()}.json").write_text(json.dumps({"created_at": created_at.isoformat(), "response": '{"answer": "42"}'}))
+
+    assert LLMCache(ttl=60, cache_dir=tmp_path).get(key, parse) is None
+    assert not (tmp_path / f"{key.hex()}.json").exists()
+
+
+def test_cache_evicts_disk_entries_that_no_longer_validate(tmp_path):
+    key = LLMCache.key("prompt", CONFIG)
+    LLMCache(ttl=60, cache_dir=tmp_path).set(key, '{"reply": "42"}', Answer(answer="42"))
+
+    assert LLMCache(ttl=60, cache_dir=tmp_path).get(key, parse) is None
+    assert not (tmp_path / f"{key.hex()}.json").exists()
+
+
+@pytest.fixture
+def llm_cache(monkeypatch):
+    cache = LLMCache(ttl=60)
+    monkeypatch.setattr(dacp_agent_common, "LLM_CACHE", cache)
+    return cache
+
+
+def test_llm_cached_reuses_validated_outputs(llm_cache):
+    prompts = []
+
+    @llm_cached(ADAPTER, DEFAULT)
+    def invoke(prompt, intelligence_config):
+        prompts.append(prompt)
+        return '{"answer": "42"}'
+
+    assert invoke("prompt", CONFIG) == Answer(answer="42")
+    assert invoke("prompt", CONFIG) == Answer(answer="42")
+    assert not llm_fell_back()
+    assert prompts == ["prompt"]
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_llm_cached_never_caches_fallbacks(llm_cache, run_async):
+    prompts = []
+
+    def respond(prompt):
+        prompts.append(prompt)
+        return "Sorry, I cannot answer that."
+
+    if run_async:
+        @llm_cached(ADAPTER, DEFAULT)
+        async def ainvoke(prompt, intelligence_config):
+            return respond(prompt)
+
+        async def call():
+            output = await ainvoke("prompt", CONFIG)
+            return output, llm_fell_back()
+
+        results = [asyncio.run(call()) for _ in range(2)]
+    else:
+        @llm_cached(ADAPTER, DEFAULT)
+        def invoke(prompt, intelligence_config):
+            return respond(prompt)
+
+        results = [(invoke("prompt", CONFIG), llm_fell_back()) for _ in range(2)]
+
+    assert results == [(DEFAULT, True)] * 2
+    assert results[0][0] is not DEFAULT
+    assert len(prompts) == 2
+    assert len(llm_cache._entries) == 0
+
+
+@pytest.mark.parametrize("response", [
+    '{"answer": "42"}',
+    b'{"answer": "42"}',
+    'Here you go:\n```json\n{"answer": "42"}\n```',
+    b'The answer is {"answer": "42"}.',
+    {"answer": "42"},
+    Answer(answer="42"),
+])
+def test_parse_llm_output_validates_responses(response):
+    assert parse(response) == (Answer(answer="42"), False)
+
+
+@pytest.mark.parametrize("response", ["no json here", b'{"reply": "42"}'])
+def test_parse_llm_output_falls_back_for_unusable_text(response):
+    output, fell_back = parse(response)
+    assert fell_back
+    assert output == DEFAULT and output is not DEFAULT
+
+
+@pytest.mark.parametrize("response", [{"reply": "42"}, 42, None])
+def test_parse_llm_output_rejects_invalid_dicts_and_other_types(response):
+    with pytest.raises(ValueError, match="DACP parser"):
+        parse(response)
+
+
+def answer_task(answer=None):
+    """A task returning an Answer, or a result missing the required field when no answer is given."""
+    return Answer(answer=answer) if answer is not None else {"reply": "42"}
+
+
+def test_task_contract_returns_fallback_for_missing_fields(monkeypatch):
+    monkeypatch.delenv("DACP_SKIP_BEHAVIOURAL_CONTRACT", raising=False)
+    task = task_contract(**CONTRACT)(answer_task)
+
+    assert task("42") == {"answer": "42"}
+    assert is_contract_fallback(task())
+
+
+def test_task_contract_only_checks_required_fields_when_skipped(monkeypatch):
+    monkeypatch.setenv("DACP_SKIP_BEHAVIOURAL_CONTRACT", "1")
+
+    def no_contract(**contract):
+        raise AssertionError("behavioural_contract should not be used")
+
+    monkeypatch.setattr(dacp_agent_common, "behavioural_contract", no_contract)
+    task = task_contract(**CONTRACT)(answer_task)
+
+    assert task("42") == Answer(answer="42")
+    with pytest.raises(BehaviouralContractViolationError, match="answer"):
+        task()
+
+
+@pytest.mark.parametrize("skip", ["0", "1"])
+def test_task_contract_wraps_coroutine_functions(monkeypatch, skip):
+    monkeypatch.setenv("DACP_SKIP_BEHAVIOURAL_CONTRACT", skip)
+
+    @task_contract(**CONTRACT)
+    async def task(answer):
+        if answer == "boom":
+            raise RuntimeError(answer)
+        return Answer(answer=answer)
+
+    assert asyncio.iscoroutinefunction(task)
+    assert dict(asyncio.run(task("42"))) == {"answer": "42"}
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(task("boom"))
+
+
+@pytest.fixture
+def new_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_aclose_clients_closes_clients_of_a_manually_run_loop(new_loop):
+    client = new_loop.run_until_complete(dacp_agent_common._get_async_openai_client(OPENAI_CONFIG))
+    assert not client.is_closed()
+
+    new_loop.run_until_complete(dacp_agent_common.aclose_clients())
+
+    assert client.is_closed()
+    assert new_loop not in dacp_agent_common._ASYNC_OPENAI_CLIENTS
+    # A later call on the same loop gets a fresh client
+    fresh = new_loop.run_until_complete(dacp_agent_common._get_async_openai_client(OPENAI_CONFIG))
+    assert fresh is not client
+    new_loop.run_until_complete(dacp_agent_common.aclose_clients())
+
+
+def test_aclose_clients_without_clients(new_loop):
+    new_loop.run_until_complete(dacp_agent_common.aclose_clients())
+
+
+def test_asyncio_run_closes_clients():
+    async def main():
+        return await dacp_agent_common._get_async_openai_client(OPENAI_CONFIG)
+
+    client = asyncio.run(main())
+    assert client.is_closed()